@@ -8,6 +8,7 @@ from app.db.session import SessionLocal
 from app.db.models import Credential
 
 from app.core.config import settings
+from app.core.responses import FastJSONResponse
 
 router = APIRouter()
 BASE_VERIFY_URL = settings.verify_base_url
@@ -26,6 +27,7 @@ async def qr_for_jti(jti: str):
 @router.get("/credentials")
 async def list_credentials():
     async with SessionLocal() as s:
-        res = await s.execute(select(Credential))
-        rows = res.scalars().all()
-        return [{"jti": r.jti, "status": r.status, "exp": r.exp, "issued_at": r.issued_at.isoformat()} for r in rows]
+        res = await s.execute(
+            select(Credential.jti, Credential.status, Credential.exp, Credential.issued_at)
+        )
+        return FastJSONResponse([r._asdict() for r in res])
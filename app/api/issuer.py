@@ -1,17 +1,29 @@
 ﻿# app/api/issuer.py
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, Header, HTTPException, Query, Response
 from pydantic import BaseModel
 from datetime import datetime, timedelta, timezone
-import time, uuid
-from sqlalchemy import select
+from collections import OrderedDict
+import asyncio, hashlib, json, time, uuid
+from sqlalchemy import func, select
+from sqlalchemy.exc import IntegrityError
 
 from app.core.config import settings
 from app.core.crypto import sign_vc
+from app.core.responses import FastJSONResponse
+from app.core.status_table import status_table
 from app.db.session import SessionLocal
 from app.db.models import Credential
+from app.db.event_log import event_log, status_event
+from app.db.partitions import event_key, event_season, hot_set, jti_prefix
+from app.db.writer import credential_writer
 
 router = APIRouter()
 
+# Idempotencia: emisiones en curso (clave -> (futuro, hash del cuerpo), para coalescer
+# duplicados concurrentes) y resultados recientes (clave -> (caduca, resultado, hash))
+_IDEM_INFLIGHT: dict[str, tuple[asyncio.Future, str]] = {}
+_IDEM_DONE: OrderedDict[str, tuple[float, dict, str]] = OrderedDict()
+
 class IssueInput(BaseModel):
     athleteDid: str
     name: str
@@ -19,13 +31,15 @@ class IssueInput(BaseModel):
     result: dict
     expDays: int = 365
 
-@router.post("/issue")
-async def issue_credential(body: IssueInput):
-    now = int(time.time())
-    exp = int((datetime.now(timezone.utc) + timedelta(days=body.expDays)).timestamp())
-    jti = f"vc-hyrox-{uuid.uuid4().hex[:12]}"
+def new_jti(event: str | None = None) -> str:
+    """vc-hyrox-<código evento>-<aleatorio>: el prefijo enruta al hot set del evento."""
+    return f"{jti_prefix(event)}{uuid.uuid4().hex[:12]}"
 
-    payload = {
+def build_vc_payload(body: IssueInput, jti: str, now: int | None = None) -> dict:
+    """Payload VC-JWT (sin firmar) de un resultado; compartido con tools/import_results.py."""
+    now = int(time.time()) if now is None else now
+    exp = int((datetime.fromtimestamp(now, timezone.utc) + timedelta(days=body.expDays)).timestamp())
+    return {
         "iss": settings.issuer_did,
         "sub": body.athleteDid,
         "nbf": now,
@@ -43,11 +57,152 @@ async def issue_credential(body: IssueInput):
         },
     }
 
-    token = sign_vc(payload)
+def idem_key_for(body: IssueInput, header_key: str | None = None) -> str | None:
+    """
+    Idempotency-Key si viene; si no, y sólo con IDEMPOTENCY_NATURAL_KEY activado,
+    clave natural athleteDid + event.id (si hay id). Las naturales llevan el prefijo
+    "nat:" para poder liberarlas al revocar.
+    """
+    if header_key:
+        return hashlib.sha256(f"key:{header_key}".encode()).hexdigest()
+    if settings.idempotency_natural_key and body.event.get("id") is not None:
+        raw = f"nat:{body.athleteDid}|{body.event['id']}"
+        return "nat:" + hashlib.sha256(raw.encode()).hexdigest()[:60]
+    return None
+
+def is_natural_key(key: str | None) -> bool:
+    return key is not None and key.startswith("nat:")
+
+def idem_body_hash(body: IssueInput) -> str:
+    """Hash del cuerpo canónico: una clave reutilizada con otro cuerpo se rechaza."""
+    raw = json.dumps(body.model_dump(), sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+def _check_body(stored_hash: str | None, body_hash: str) -> None:
+    if stored_hash is not None and stored_hash != body_hash:
+        raise HTTPException(status_code=422, detail="Idempotency-Key reused with a different request body")
+
+def _idem_cache_get(key: str) -> tuple[dict, str] | None:
+    hit = _IDEM_DONE.get(key)
+    if hit is None:
+        return None
+    table = status_table()
+    if hit[0] < time.monotonic() or (
+        # Revocada en otro worker: no se repite, la BD decide
+        table is not None and (st := table.get(hit[1]["jti"])) is not None and st[0] != "valid"
+    ):
+        _IDEM_DONE.pop(key, None)
+        return None
+    return hit[1], hit[2]
+
+def _idem_cache_put(key: str, result: dict, body_hash: str) -> None:
+    _IDEM_DONE[key] = (time.monotonic() + settings.idempotency_ttl, result, body_hash)
+    _IDEM_DONE.move_to_end(key)
+    while len(_IDEM_DONE) > settings.idempotency_cache_size:
+        _IDEM_DONE.popitem(last=False)
+
+async def _find_by_idem_key(key: str) -> tuple[dict, str | None, str] | None:
+    """Emisión con esa clave: ((jti, token), hash del cuerpo, status)."""
     async with SessionLocal() as s:
-        s.add(Credential(jti=jti, jwt=token, exp=exp, status="valid"))
-        await s.commit()
-    return {"jti": jti, "token": token}
+        r = (await s.execute(
+            select(Credential.jti, Credential.jwt, Credential.idem_body_hash, Credential.status)
+            .where(Credential.idem_key == key)
+        )).one_or_none()
+        return ({"jti": r.jti, "token": r.jwt}, r.idem_body_hash, r.status) if r else None
+
+async def _replay(key: str, body_hash: str) -> dict | None:
+    prev = await _find_by_idem_key(key)
+    if prev is None:
+        return None
+    _check_body(prev[1], body_hash)
+    if prev[2] == "revoked":
+        # La Idempotency-Key sigue ligada a su primer resultado: un reintento tardío
+        # no puede resucitar una credencial revocada
+        raise HTTPException(status_code=410, detail=f"credential {prev[0]['jti']} was revoked")
+    return prev[0]
+
+async def _issue(body: IssueInput, idem_key: str | None, body_hash: str | None = None) -> tuple[dict, bool]:
+    """Firma y guarda. Devuelve (resultado, es_repetición)."""
+    if idem_key is not None and (prev := await _replay(idem_key, body_hash)):
+        return prev, True
+
+    event = event_key(body.event)
+    jti = new_jti(event)
+    payload = build_vc_payload(body, jti)
+    exp = payload["exp"]
+
+    token = sign_vc(payload)
+    # Group-commit: se agrupa con otras emisiones concurrentes; volvemos tras el commit.
+    # El evento SSE se registra en la misma transacción (lo difunden todos los workers)
+    ev = status_event("issued", jti, "valid", exp=exp)
+    try:
+        await credential_writer.add(Credential(
+            jti=jti, jwt=token, exp=exp, status="valid", idem_key=idem_key,
+            idem_body_hash=body_hash if idem_key is not None else None,
+            event=event, season=event_season(body.event),
+        ), ev)
+    except IntegrityError:
+        # Otro worker ha emitido con la misma clave a la vez: nos quedamos con la suya
+        if idem_key is not None and (prev := await _replay(idem_key, body_hash)):
+            return prev, True
+        raise
+    if (table := status_table()) is not None:
+        table.put(jti, "valid", exp)
+    hot_set.add(jti, "valid", exp)
+    await event_log.sync(ev.seq)
+    return {"jti": jti, "token": token}, False
+
+@router.post("/issue")
+async def issue_credential(
+    body: IssueInput,
+    response: Response,
+    idempotency_key: str | None = Header(None),
+):
+    """
+    Emite una credencial. Con Idempotency-Key (o, si IDEMPOTENCY_NATURAL_KEY está
+    activado, athleteDid + event.id) un reintento devuelve el mismo jti/token sin
+    volver a firmar: los duplicados concurrentes esperan a la primera emisión y los
+    ya completados salen de una cache con TTL o, en su defecto, de la BD (restricción
+    UNIQUE sobre idem_key). La misma clave con otro cuerpo -> 422, y si su credencial
+    se revocó -> 410. Sólo la clave natural se libera al revocar (emitir un resultado
+    corregido).
+    """
+    key = idem_key_for(body, idempotency_key)
+    if key is None:
+        result, _ = await _issue(body, None)
+        return result
+    body_hash = idem_body_hash(body)
+
+    if (cached := _idem_cache_get(key)) is not None:
+        _check_body(cached[1], body_hash)
+        response.headers["Idempotent-Replayed"] = "true"
+        return cached[0]
+
+    inflight = _IDEM_INFLIGHT.get(key)
+    if inflight is not None:
+        _check_body(inflight[1], body_hash)
+        response.headers["Idempotent-Replayed"] = "true"
+        return await asyncio.shield(inflight[0])
+
+    fut = asyncio.get_running_loop().create_future()
+    _IDEM_INFLIGHT[key] = (fut, body_hash)
+    try:
+        result, replayed = await _issue(body, key, body_hash)
+    except BaseException as e:
+        if isinstance(e, Exception):
+            fut.set_exception(e)
+            fut.exception()  # marcado como recuperado aunque nadie más espere
+        else:
+            fut.cancel()  # petición cancelada: los duplicados en espera también
+        raise
+    else:
+        _idem_cache_put(key, result, body_hash)
+        fut.set_result(result)
+    finally:
+        _IDEM_INFLIGHT.pop(key, None)
+    if replayed:
+        response.headers["Idempotent-Replayed"] = "true"
+    return result
 
 class RevokeInput(BaseModel):
     jti: str
@@ -61,30 +216,42 @@ async def revoke_credential(body: RevokeInput):
         if not cred:
             raise HTTPException(status_code=404, detail="jti not found")
         cred.status = "revoked"
+        if cred.idem_key is not None:
+            _IDEM_DONE.pop(cred.idem_key, None)
+        # Sólo la clave natural se libera (revocar y emitir el resultado corregido);
+        # una Idempotency-Key del cliente queda ligada a esta emisión (reintento -> 410)
+        if is_natural_key(cred.idem_key):
+            cred.idem_key = None
+            cred.idem_body_hash = None
+        ev = status_event("revoked", body.jti, "revoked", reason=body.reason)
+        s.add(ev)
         await s.commit()
+    if (table := status_table()) is not None:
+        table.put(body.jti, "revoked", cred.exp)
+    hot_set.set_status(body.jti, "revoked")
+    await event_log.sync(ev.seq)
     return {"ok": True, "jti": body.jti, "status": "revoked"}
 
 @router.get("/list")
 async def list_issuer():
+    # Sólo las columnas necesarias (sin cargar el JWT) y serializado con orjson,
+    # que ya convierte issued_at a ISO 8601 sin pasar por jsonable_encoder
     async with SessionLocal() as s:
-        res = await s.execute(select(Credential))
-        rows = res.scalars().all()
-        return [
-            {"jti": r.jti, "status": r.status, "exp": r.exp, "issued_at": r.issued_at.isoformat()}
-            for r in rows
-        ]
+        res = await s.execute(
+            select(Credential.jti, Credential.status, Credential.exp, Credential.issued_at)
+        )
+        return FastJSONResponse([r._asdict() for r in res])
 
 @router.get("/detail")
 async def detail_issuer(jti: str = Query(...)):
     async with SessionLocal() as s:
-        res = await s.execute(select(Credential).where(Credential.jti == jti))
-        r = res.scalar_one_or_none()
+        res = await s.execute(
+            select(
+                Credential.jti, Credential.status, Credential.exp, Credential.issued_at,
+                func.length(Credential.jwt).label("jwt_len"),
+            ).where(Credential.jti == jti)
+        )
+        r = res.one_or_none()
         if not r:
             raise HTTPException(status_code=404, detail="jti not found")
-        return {
-            "jti": r.jti,
-            "status": r.status,
-            "exp": r.exp,
-            "issued_at": r.issued_at.isoformat(),
-            "jwt_len": len(r.jwt),
-        }
+        return FastJSONResponse(r._asdict())
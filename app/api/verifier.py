@@ -1,10 +1,16 @@
-from fastapi import APIRouter, Query
+from fastapi import APIRouter, Header, Query
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from sqlalchemy import select
 
 from app.core.crypto import verify_vc
+from app.core.events import hub, sse_stream
+from app.core.responses import FastJSONResponse
+from app.core.status_table import status_table
 from app.db.session import SessionLocal
 from app.db.models import Credential
+from app.db.event_log import event_log
+from app.db.partitions import hot_set
 
 router = APIRouter()
 
@@ -15,6 +21,11 @@ class VerifyInput(BaseModel):
 
 @router.post("/verify")
 async def verify_token(body: VerifyInput):
+    # Sólo tipos JSON básicos: se serializa directamente, sin jsonable_encoder
+    return FastJSONResponse(await _verify_token(body))
+
+
+async def _verify_token(body: VerifyInput) -> dict:
     # verify_vc ya intenta did:web si está activado y hace fallback a PEM si procede
     res = verify_vc(body.token)
     if not res["valid"]:
@@ -27,12 +38,24 @@ async def verify_token(body: VerifyInput):
     if not jti:
         return {"valid": False, "reason": "no-jti-in-token"}
 
-    async with SessionLocal() as s:
-        dbcred = (await s.execute(select(Credential).where(Credential.jti == jti))).scalar_one_or_none()
-        if not dbcred:
-            return {"valid": False, "reason": "jti-not-found"}
-        if dbcred.status != "valid":
-            return {"valid": False, "reason": f"status={dbcred.status}"}
+    # Estado: tabla compartida entre workers -> hot set del evento -> BD (y se calientan)
+    table = status_table()
+    cached = table.get(jti) if table is not None else None
+    if cached is not None:
+        status = cached[0]
+    elif (hot := hot_set.lookup(jti)) is not None:
+        status = hot[0]
+    else:
+        async with SessionLocal() as s:
+            dbcred = (await s.execute(select(Credential).where(Credential.jti == jti))).scalar_one_or_none()
+            if not dbcred:
+                return {"valid": False, "reason": "jti-not-found"}
+            status = dbcred.status
+        if table is not None:
+            table.put_if_absent(jti, dbcred.status, dbcred.exp)
+        hot_set.note_miss(jti, dbcred.event)
+    if status != "valid":
+        return {"valid": False, "reason": f"status={status}"}
 
     return {
         "valid": True,
@@ -47,17 +70,35 @@ async def verify_token(body: VerifyInput):
 
 @router.get("/scan")
 async def scan_by_jti(jti: str = Query(...)):
+    return FastJSONResponse(await _scan_by_jti(jti))
+
+
+async def _scan_by_jti(jti: str) -> dict:
+    # Revocada según la tabla compartida o el hot set -> sin tocar la BD ni verificar firma
+    table = status_table()
+    cached = table.get(jti) if table is not None else None
+    if cached is not None and cached[0] != "valid":
+        return {"valid": False, "reason": f"status={cached[0]}"}
+    hot = hot_set.lookup(jti)
+    if hot is not None and hot[0] != "valid":
+        return {"valid": False, "reason": f"status={hot[0]}"}
+
+    # El token no se guarda en memoria: siempre sale de la BD (sólo las columnas necesarias)
     async with SessionLocal() as s:
-        dbcred = (await s.execute(select(Credential).where(Credential.jti == jti))).scalar_one_or_none()
-        if not dbcred:
-            return {"valid": False, "reason": "jti not found"}
-        token = dbcred.jwt
+        row = (await s.execute(
+            select(Credential.jwt, Credential.status, Credential.event).where(Credential.jti == jti)
+        )).one_or_none()
+    if not row:
+        return {"valid": False, "reason": "jti not found"}
+    status, token = row.status, row.jwt
+    if hot is None:
+        hot_set.note_miss(jti, row.event)
 
     res = verify_vc(token)
     if not res["valid"]:
         return {"valid": False, "reason": res.get("reason", "invalid")}
-    if dbcred.status != "valid":
-        return {"valid": False, "reason": f"status={dbcred.status}"}
+    if status != "valid":
+        return {"valid": False, "reason": f"status={status}"}
 
     payload = res["payload"]
     return {
@@ -69,3 +110,27 @@ async def scan_by_jti(jti: str = Query(...)):
             "exp": payload.get("exp"),
         },
     }
+
+
+@router.get("/events")
+async def status_events(
+    since: str | None = Query(None, description="id '<epoch>-<seq>' desde el que reanudar"),
+    last_event_id: str | None = Header(None),
+):
+    """
+    Stream SSE de emisiones/revocaciones. Para reanudar tras una desconexión basta con
+    el Last-Event-ID que envía EventSource (o ?since=). Si el hueco ya no está en el
+    histórico se envía un evento "reset": el cliente debe vaciar su cache de estados.
+
+    Los eventos salen del registro compartido en BD (app/db/event_log.py): cualquier
+    worker envía los cambios hechos en todos, con la misma secuencia, así que el
+    cliente puede reconectar a otro worker detrás del balanceador.
+    """
+    # Al día antes de suscribir: el id del cliente puede venir de un worker más adelantado
+    await event_log.poll()
+    sub = hub.subscribe(last_event_id or since)
+    return StreamingResponse(
+        sse_stream(sub),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -0,0 +1,69 @@
+# app/api/wellknown.py
+from fastapi import APIRouter, Request, Response
+import hashlib
+import json
+
+from app.core.config import settings
+from app.core.crypto import load_public_keyset
+
+router = APIRouter()
+
+# Documentos precalculados: (tipo, issuer_did, kids) -> (body, etag)
+_DOC_CACHE: dict[tuple, tuple[bytes, str]] = {}
+
+
+def _did_document(issuer_did: str, jwks: list[dict]) -> dict:
+    vms = [
+        {
+            "id": f"{issuer_did}#{jwk['kid']}",
+            "type": "JsonWebKey2020",
+            "controller": issuer_did,
+            "publicKeyJwk": jwk,
+        }
+        for jwk in jwks
+    ]
+    # La primera es la clave de firma actual: los resolvers usan assertionMethod[0] por defecto
+    refs = [vm["id"] for vm in vms]
+    return {
+        "@context": ["https://www.w3.org/ns/did/v1", "https://w3id.org/security/suites/jws-2020/v1"],
+        "id": issuer_did,
+        "verificationMethod": vms,
+        "assertionMethod": refs,
+        "authentication": refs,
+    }
+
+
+def _jwks_document(jwks: list[dict]) -> dict:
+    return {"keys": [{**jwk, "use": "sig", "alg": settings.jwt_alg} for jwk in jwks]}
+
+
+def _precomputed(kind: str) -> tuple[bytes, str]:
+    """Cuerpo + ETag, calculados una sola vez por juego de claves (y DID)."""
+    jwks = [jwk for jwk, _ in load_public_keyset()]
+    cache_key = (kind, settings.issuer_did, settings.jwt_alg, tuple(j["kid"] for j in jwks))
+    cached = _DOC_CACHE.get(cache_key)
+    if cached is None:
+        doc = _did_document(settings.issuer_did, jwks) if kind == "did" else _jwks_document(jwks)
+        body = json.dumps(doc, separators=(",", ":")).encode("utf-8")
+        etag = '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+        cached = _DOC_CACHE[cache_key] = (body, etag)
+    return cached
+
+
+def _cached_response(request: Request, kind: str, media_type: str) -> Response:
+    body, etag = _precomputed(kind)
+    headers = {"ETag": etag, "Cache-Control": f"public, max-age={settings.wellknown_max_age}"}
+    inm = request.headers.get("if-none-match", "")
+    if etag in [t.strip().removeprefix("W/") for t in inm.split(",")] or inm.strip() == "*":
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type=media_type, headers=headers)
+
+
+@router.get("/did.json")
+def did_json(request: Request):
+    return _cached_response(request, "did", "application/did+json")
+
+
+@router.get("/jwks.json")
+def jwks_json(request: Request):
+    return _cached_response(request, "jwks", "application/json")
@@ -0,0 +1,175 @@
+# app/core/admission.py
+from __future__ import annotations
+
+from collections import OrderedDict
+import asyncio
+import json
+import math
+import time
+
+from app.core import metrics
+from app.core.config import settings
+
+
+class TokenBucket:
+    """Bucket de tokens por cliente: `rate` peticiones/s con ráfagas de hasta `burst`."""
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+
+    def take(self) -> float:
+        """Consume un token. Devuelve 0 si se admite o los segundos hasta el siguiente token."""
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate if self.rate > 0 else 1.0
+
+
+class Lane:
+    """
+    Carril de admisión: como mucho `limit` peticiones en curso; el resto espera
+    un máximo de `budget_ms`. Menor `priority` = más prioritario.
+    """
+
+    def __init__(self, name: str, limit: int, priority: int = 0, budget_ms: float = 250):
+        self.name = name
+        self.limit = max(1, limit)
+        self.priority = priority
+        self.budget_ms = budget_ms
+        self.waiting = 0
+        self._sem = asyncio.Semaphore(self.limit)
+        self.admitted = metrics.counter(f"admission_{name}_admitted")
+        self.queued = metrics.counter(f"admission_{name}_queued")
+        self.shed = metrics.counter(f"admission_{name}_shed")
+
+    async def acquire(self) -> bool:
+        if not self._sem.locked():
+            await self._sem.acquire()
+            self.admitted.inc()
+            return True
+        self.waiting += 1
+        self.queued.inc()
+        try:
+            await asyncio.wait_for(self._sem.acquire(), self.budget_ms / 1000)
+        except asyncio.TimeoutError:
+            self.shed.inc()
+            return False
+        finally:
+            self.waiting -= 1
+        self.admitted.inc()
+        return True
+
+    def release(self) -> None:
+        self._sem.release()
+
+
+class AdmissionMiddleware:
+    """
+    Control de admisión (ASGI) delante de los routers de issuer/verifier.
+
+    - Bucket de tokens por cliente -> 429 + Retry-After si se agota. Desactivado por
+      defecto: el cliente es la IP del socket (detrás de un proxy o NAT, todo el sitio
+      comparte un bucket) salvo que se indique `client_header`, una cabecera puesta por
+      un proxy de confianza (de X-Forwarded-For se toma la última IP, la que añade él).
+    - Carril por ruta con límite de concurrencia; si la espera supera el presupuesto
+      de latencia del carril -> 503 + Retry-After (mejor fallar rápido que encolar sin fin).
+    - Prioridades: un carril se descarta al instante (503) si otro más prioritario
+      tiene peticiones esperando (p.ej. los listados ceden ante emisión/verificación).
+    """
+
+    def __init__(
+        self,
+        app,
+        routes: dict[str, Lane],
+        client_rate: float = 0,
+        client_burst: float = 0,
+        client_header: str = "",
+        max_clients: int = 10_000,
+    ):
+        self.app = app
+        self.routes = routes
+        self.lanes = sorted({id(l): l for l in routes.values()}.values(), key=lambda l: l.priority)
+        self.client_rate = client_rate
+        self.client_burst = max(1.0, client_burst)
+        self.client_header = client_header.lower().encode("latin-1")
+        self.max_clients = max_clients
+        self._buckets: OrderedDict[str, TokenBucket] = OrderedDict()
+        self.rate_limited = metrics.counter("admission_rate_limited")
+
+    def _bucket(self, client: str) -> TokenBucket:
+        b = self._buckets.get(client)
+        if b is None:
+            b = self._buckets[client] = TokenBucket(self.client_rate, self.client_burst)
+            if len(self._buckets) > self.max_clients:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(client)
+        return b
+
+    def _client_id(self, scope) -> str:
+        if self.client_header:
+            for name, value in scope.get("headers", []):
+                if name == self.client_header:
+                    forwarded = value.decode("latin-1").rsplit(",", 1)[-1].strip()
+                    if forwarded:
+                        return forwarded
+        return (scope.get("client") or ("unknown", 0))[0]
+
+    @staticmethod
+    async def _reject(send, status: int, retry_after: float, reason: str) -> None:
+        body = json.dumps({"detail": reason}).encode()
+        await send({
+            "type": "http.response.start",
+            "status": status,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", str(max(1, math.ceil(retry_after))).encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
+
+    async def __call__(self, scope, receive, send):
+        lane = self.routes.get(scope.get("path", "")) if scope["type"] == "http" else None
+        if lane is None:
+            return await self.app(scope, receive, send)
+
+        if self.client_rate > 0:
+            wait = self._bucket(self._client_id(scope)).take()
+            if wait > 0:
+                self.rate_limited.inc()
+                return await self._reject(send, 429, wait, "rate limit exceeded")
+
+        if any(l.waiting for l in self.lanes if l.priority < lane.priority):
+            lane.shed.inc()
+            return await self._reject(send, 503, lane.budget_ms / 1000, "overloaded, try later")
+
+        if not await lane.acquire():
+            return await self._reject(send, 503, lane.budget_ms / 1000, "overloaded, try later")
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            lane.release()
+
+
+def default_routes() -> dict[str, Lane]:
+    """Carriles de la app según Settings: emisión y verificación por delante de los listados."""
+    budget = settings.admission_queue_budget_ms
+    issue = Lane("issue", settings.admission_issue_concurrency, priority=0, budget_ms=budget)
+    verify = Lane("verify", settings.admission_verify_concurrency, priority=0, budget_ms=budget)
+    listing = Lane("list", settings.admission_list_concurrency, priority=1, budget_ms=budget)
+    return {
+        "/issuer/issue": issue,
+        "/issuer/revoke": issue,
+        "/verifier/verify": verify,
+        "/verifier/scan": verify,
+        "/issuer/list": listing,
+        "/issuer/detail": listing,
+        "/holder/credentials": listing,
+    }
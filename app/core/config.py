@@ -6,6 +6,10 @@ class Settings(BaseSettings):
     # Base de datos
     db_url: str = Field("sqlite+aiosqlite:///./dap.sqlite3", alias="DB_URL")
 
+    # Group-commit de emisiones: tamaño máximo de lote y espera máxima (ms)
+    write_batch_max: int = Field(64, alias="WRITE_BATCH_MAX")
+    write_batch_delay_ms: float = Field(2.0, alias="WRITE_BATCH_DELAY_MS")
+
     # Cripto/JWT
     jwt_alg: str = Field("RS256", alias="JWT_ALG")
     issuer_did: str = Field("did:example:issuerHYX", alias="ISSUER_DID")
@@ -13,6 +17,8 @@ class Settings(BaseSettings):
     # Rutas de claves PEM (fallback local)
     priv_key_path: str = Field("keys/issuer_private.pem", alias="ISSUER_PRIVATE_KEY_PATH")
     pub_key_path: str = Field("keys/issuer_public.pem", alias="ISSUER_PUBLIC_KEY_PATH")
+    # Claves públicas extra aún activas durante una rotación (separadas por comas)
+    extra_pub_key_paths: str = Field("", alias="ISSUER_EXTRA_PUBLIC_KEY_PATHS")
 
     # Verificación por JTI (para QR)
     verify_base_url: str = Field("http://127.0.0.1:8000/verifier/scan", alias="VERIFY_BASE_URL")
@@ -20,6 +26,51 @@ class Settings(BaseSettings):
     # === did:web (opcional) ===
     use_did_web: bool = Field(False, alias="USE_DID_WEB")
     allow_pem_fallback: bool = Field(True, alias="ALLOW_PEM_FALLBACK")
+    # TTL (s) del did.json resuelto si el servidor no envía Cache-Control: max-age
+    did_web_cache_ttl: int = Field(300, alias="DID_WEB_CACHE_TTL")
+    # Tras un 'kid' desconocido, como mucho una nueva descarga del did.json cada N s
+    did_web_refetch_interval: int = Field(30, alias="DID_WEB_REFETCH_INTERVAL")
+    # max-age (s) de nuestro /.well-known/did.json y /.well-known/jwks.json
+    wellknown_max_age: int = Field(300, alias="WELLKNOWN_MAX_AGE")
+
+    # Idempotencia de /issuer/issue: TTL (s) y tamaño de la cache de resultados recientes
+    idempotency_ttl: int = Field(86_400, alias="IDEMPOTENCY_TTL")
+    idempotency_cache_size: int = Field(10_000, alias="IDEMPOTENCY_CACHE_SIZE")
+    # Sin Idempotency-Key, usar athleteDid + event.id como clave natural (opt-in)
+    idempotency_natural_key: bool = Field(False, alias="IDEMPOTENCY_NATURAL_KEY")
+
+    # Tamaño mínimo (bytes) para comprimir con gzip los listados
+    gzip_min_size: int = Field(1024, alias="GZIP_MIN_SIZE")
+
+    # Eventos SSE (/verifier/events): cada worker sondea la tabla status_events cada
+    # EVENTS_POLL_MS ms; se conservan las últimas EVENTS_LOG_KEEP filas
+    events_poll_ms: float = Field(200, alias="EVENTS_POLL_MS")
+    events_log_keep: int = Field(100_000, alias="EVENTS_LOG_KEEP")
+
+    # Tabla jti -> estado compartida entre workers del host (fichero mmap); vacío = desactivada
+    status_table_path: str = Field("", alias="STATUS_TABLE_PATH")
+    status_table_capacity: int = Field(262_144, alias="STATUS_TABLE_CAPACITY")
+
+    # Hot set por evento en el verificador: nº de eventos en memoria, tamaño máximo
+    # de partición cargable y cada cuántos segundos se releen las revocaciones.
+    # 0 = desactivado (opt-in): con varios workers puede servir un estado de hace
+    # hasta HOTSET_REFRESH_S segundos
+    hotset_max_events: int = Field(0, alias="HOTSET_MAX_EVENTS")
+    hotset_max_rows: int = Field(50_000, alias="HOTSET_MAX_ROWS")
+    hotset_refresh_s: float = Field(2.0, alias="HOTSET_REFRESH_S")
+
+    # === Control de admisión (issuer/verifier) ===
+    admission_enabled: bool = Field(True, alias="ADMISSION_ENABLED")
+    # Concurrencia máxima por carril y espera máxima en cola (ms) antes de 503
+    admission_issue_concurrency: int = Field(16, alias="ADMISSION_ISSUE_CONCURRENCY")
+    admission_verify_concurrency: int = Field(32, alias="ADMISSION_VERIFY_CONCURRENCY")
+    admission_list_concurrency: int = Field(4, alias="ADMISSION_LIST_CONCURRENCY")
+    admission_queue_budget_ms: float = Field(250, alias="ADMISSION_QUEUE_BUDGET_MS")
+    # Bucket por cliente (peticiones/s y ráfaga); 0 = sin límite por cliente (opt-in)
+    admission_client_rate: float = Field(0, alias="ADMISSION_CLIENT_RATE")
+    admission_client_burst: float = Field(100, alias="ADMISSION_CLIENT_BURST")
+    # Cabecera de un proxy de confianza con la IP real (p.ej. X-Forwarded-For); vacío = socket
+    admission_client_header: str = Field("", alias="ADMISSION_CLIENT_HEADER")
 
     model_config = SettingsConfigDict(
         env_file=".env",
@@ -3,7 +3,9 @@ from __future__ import annotations
 
 from pathlib import Path
 import json
+import time
 import base64
+import hashlib
 import urllib.request
 import urllib.error
 
@@ -12,20 +14,38 @@ from jwt import InvalidTokenError
 from cryptography.hazmat.primitives import serialization
 from app.core.config import settings
 
-# Cache muy simple en memoria para claves resueltas por did:web
-_DID_WEB_PUBKEY_CACHE: dict[str, object] = {}
+# Cache en memoria para claves resueltas por did:web:
+#   issuer_did -> {"keys": {kid: pub}, "default": pub, "expires": ts, "etag": str | None,
+#                  "miss_at": ts | None (último 'kid' desconocido tras descargar)}
+_DID_WEB_PUBKEY_CACHE: dict[str, dict] = {}
+
+# Cache de claves locales leídas de disco: (ruta, mtime) -> objeto clave
+_PEM_CACHE: dict[tuple[str, int], object] = {}
+# JWK (con kid) ya calculada por clave local (PEM): id(clave) -> (clave, jwk).
+# Las claves remotas (did:web) no pasan por aquí para que no crezca sin límite.
+_JWK_CACHE: dict[int, tuple[object, dict]] = {}
+
+
+def _load_pem(path: str, private: bool):
+    p = Path(path)
+    cache_key = (str(p.resolve()), p.stat().st_mtime_ns)
+    key = _PEM_CACHE.get(cache_key)
+    if key is None:
+        raw = p.read_bytes()
+        if private:
+            key = serialization.load_pem_private_key(raw, password=None)
+        else:
+            key = serialization.load_pem_public_key(raw)
+        _PEM_CACHE[cache_key] = key
+    return key
 
 
 def _load_private_key():
-    return serialization.load_pem_private_key(
-        Path(settings.priv_key_path).read_bytes(), password=None
-    )
+    return _load_pem(settings.priv_key_path, private=True)
 
 
 def _load_public_key_pem():
-    return serialization.load_pem_public_key(
-        Path(settings.pub_key_path).read_bytes()
-    )
+    return _load_pem(settings.pub_key_path, private=False)
 
 
 def _b64url_to_int(s: str) -> int:
@@ -34,6 +54,71 @@ def _b64url_to_int(s: str) -> int:
     return int.from_bytes(base64.urlsafe_b64decode(s.encode()), "big")
 
 
+def _int_to_b64url(i: int) -> str:
+    b = i.to_bytes((i.bit_length() + 7) // 8, "big")
+    return base64.urlsafe_b64encode(b).decode().rstrip("=")
+
+
+def _rsa_jwk(pub) -> dict:
+    """JWK RSA pública con 'kid' = thumbprint RFC 7638 (sin cachear)."""
+    numbers = pub.public_numbers()
+    jwk = {"kty": "RSA", "n": _int_to_b64url(numbers.n), "e": _int_to_b64url(numbers.e)}
+    canonical = json.dumps({k: jwk[k] for k in ("e", "kty", "n")}, separators=(",", ":"))
+    jwk["kid"] = base64.urlsafe_b64encode(hashlib.sha256(canonical.encode()).digest()).decode().rstrip("=")
+    return jwk
+
+
+def public_key_to_jwk(pub) -> dict:
+    """JWK RSA pública con 'kid' = thumbprint RFC 7638, cacheada (claves locales)."""
+    cached = _JWK_CACHE.get(id(pub))
+    if cached is not None and cached[0] is pub:
+        return cached[1]
+    jwk = _rsa_jwk(pub)
+    _JWK_CACHE[id(pub)] = (pub, jwk)
+    return jwk
+
+
+def _public_key_paths() -> list[str]:
+    """Clave pública principal + claves extra activas (rotación)."""
+    extra = [p.strip() for p in settings.extra_pub_key_paths.split(",") if p.strip()]
+    return [settings.pub_key_path, *extra]
+
+
+def load_public_keyset() -> list[tuple[dict, object]]:
+    """
+    Claves públicas activas como [(jwk, clave)], sin duplicados.
+    Sólo necesita las públicas: si además hay clave privada (emisor), la suya va primera.
+    """
+    try:
+        signing = signing_kid()
+    except (OSError, ValueError):
+        signing = None  # verificador sin clave privada
+    keyset: dict[str, tuple[dict, object]] = {}
+    for path in _public_key_paths():
+        pub = _load_pem(path, private=False)
+        jwk = public_key_to_jwk(pub)
+        keyset.setdefault(jwk["kid"], (jwk, pub))
+    first = keyset.pop(signing, None) if signing else None
+    return ([first] if first else []) + list(keyset.values())
+
+
+def signing_kid() -> str:
+    priv = _load_private_key()
+    cached = _JWK_CACHE.get(id(priv))
+    if cached is None or cached[0] is not priv:
+        cached = _JWK_CACHE[id(priv)] = (priv, _rsa_jwk(priv.public_key()))
+    return cached[1]["kid"]
+
+
+def _local_public_key(kid: str | None):
+    """Clave local por 'kid' (rotación); sin 'kid' o desconocido -> PEM principal."""
+    if kid:
+        for jwk, pub in load_public_keyset():
+            if jwk["kid"] == kid:
+                return pub
+    return _load_public_key_pem()
+
+
 def _did_web_to_url(issuer_did: str) -> str:
     """
     did:web:example.org              -> https://example.org/.well-known/did.json
@@ -48,56 +133,118 @@ def _did_web_to_url(issuer_did: str) -> str:
     return f"https://{host}/.well-known/did.json"
 
 
-def _resolve_did_web_rsa_pubkey(issuer_did: str) -> object | None:
+def _max_age(headers) -> int | None:
+    """Extrae max-age de Cache-Control (None si no hay o no se puede cachear)."""
+    if headers is None:
+        return None
+    cc = headers.get("Cache-Control") or ""
+    directives = [d.strip().lower() for d in cc.split(",")]
+    if "no-store" in directives or "no-cache" in directives:
+        return 0
+    for d in directives:
+        if d.startswith("max-age="):
+            try:
+                return max(0, int(d[len("max-age="):]))
+            except ValueError:
+                return None
+    return None
+
+
+def _jwk_to_rsa_pubkey(jwk: dict) -> object | None:
+    if not jwk or jwk.get("kty") != "RSA" or "n" not in jwk or "e" not in jwk:
+        return None
+
+    from cryptography.hazmat.primitives.asymmetric import rsa
+    from cryptography.hazmat.backends import default_backend
+
+    n = _b64url_to_int(jwk["n"])
+    e = _b64url_to_int(jwk["e"])
+    return rsa.RSAPublicNumbers(e, n).public_key(default_backend())
+
+
+def _parse_did_document(doc: dict) -> tuple[dict[str, object], object | None]:
+    """
+    Devuelve ({kid: clave}, clave_por_defecto). Cada verificationMethod RSA se indexa
+    por su fragmento '#...', por el 'kid' de su JWK y por su thumbprint.
+    La clave por defecto es la primera del assertionMethod.
     """
-    Si issuer_did es did:web:..., descarga el did.json, extrae la JWK (RSA) del assertionMethod
-    y construye una clave pública compatible con PyJWT/cryptography.
+    keys: dict[str, object] = {}
+    by_vm_id: dict[str, object] = {}
+    for vm in doc.get("verificationMethod", []):
+        jwk = vm.get("publicKeyJwk")
+        pub = _jwk_to_rsa_pubkey(jwk)
+        if pub is None:
+            continue
+        vm_id = vm.get("id", "")
+        by_vm_id[vm_id] = pub
+        aliases = {vm_id.partition("#")[2], jwk.get("kid"), _rsa_jwk(pub)["kid"]}
+        for alias in aliases - {None, ""}:
+            keys.setdefault(alias, pub)
+
+    am = doc.get("assertionMethod", [])
+    if not am:
+        return keys, None
+    ref = am[0] if isinstance(am, list) else am
+    if isinstance(ref, dict):  # por si viniera en objeto, usa su "id"
+        ref = ref.get("id")
+    return keys, by_vm_id.get(ref)
+
+
+def _resolve_did_web_rsa_pubkey(issuer_did: str, kid: str | None = None) -> object | None:
+    """
+    Si issuer_did es did:web:..., descarga el did.json, extrae la JWK (RSA) con ese 'kid'
+    (o la del assertionMethod si no hay 'kid') y construye una clave pública compatible
+    con PyJWT/cryptography.
+
+    El did.json se cachea respetando Cache-Control: max-age (DID_WEB_CACHE_TTL si no viene)
+    y, al caducar, se revalida con If-None-Match/ETag. Si aparece un 'kid' desconocido
+    (rotación) se vuelve a descargar, pero como mucho una vez cada
+    DID_WEB_REFETCH_INTERVAL segundos por emisor: el host lo elige quien firma el token.
     Devuelve el objeto clave pública o None si no se puede resolver.
     """
     try:
         if not issuer_did or not issuer_did.startswith("did:web:"):
             return None
 
-        # Cache: evita descargar/parsear en cada verificación
-        if issuer_did in _DID_WEB_PUBKEY_CACHE:
-            return _DID_WEB_PUBKEY_CACHE[issuer_did]
+        entry = _DID_WEB_PUBKEY_CACHE.get(issuer_did)
+        now = time.monotonic()
+        if entry is not None:
+            known = not kid or kid in entry["keys"]
+            recent_miss = entry["miss_at"] is not None and now - entry["miss_at"] < settings.did_web_refetch_interval
+            if (known and entry["expires"] > now) or (not known and recent_miss):
+                return entry["keys"].get(kid) or entry["default"]
 
         url = _did_web_to_url(issuer_did)
-
-        with urllib.request.urlopen(url, timeout=5) as resp:
-            raw = resp.read().decode("utf-8")
-            doc = json.loads(raw)
-
-        # 1) assertionMethod → id de la clave
-        am = doc.get("assertionMethod", [])
-        if not am:
-            return None
-        ref = am[0] if isinstance(am, list) else am
-        if isinstance(ref, dict):  # por si viniera en objeto, usa su "id"
-            ref = ref.get("id")
-
-        # 2) verificationMethod con ese id
-        vms = doc.get("verificationMethod", [])
-        vm = next((x for x in vms if x.get("id") == ref), None)
-        if not vm:
-            return None
-
-        jwk = vm.get("publicKeyJwk")
-        if not jwk or jwk.get("kty") != "RSA" or "n" not in jwk or "e" not in jwk:
+        req = urllib.request.Request(url, headers={"Accept": "application/did+json, application/json"})
+        if entry is not None and entry.get("etag"):
+            req.add_header("If-None-Match", entry["etag"])
+
+        try:
+            with urllib.request.urlopen(req, timeout=5) as resp:
+                raw = resp.read().decode("utf-8")
+                headers = getattr(resp, "headers", None)
+        except urllib.error.HTTPError as e:
+            if e.code == 304 and entry is not None:
+                ttl = _max_age(e.headers)
+                entry["expires"] = now + (settings.did_web_cache_ttl if ttl is None else ttl)
+                if kid and kid not in entry["keys"]:
+                    entry["miss_at"] = now
+                return entry["keys"].get(kid) or entry["default"]
+            raise
+
+        keys, default = _parse_did_document(json.loads(raw))
+        if default is None and not keys:
             return None
 
-        # 3) Construir clave pública RSA a partir de n, e
-        n = _b64url_to_int(jwk["n"])
-        e = _b64url_to_int(jwk["e"])
-
-        from cryptography.hazmat.primitives.asymmetric import rsa
-        from cryptography.hazmat.backends import default_backend
-
-        pub_numbers = rsa.RSAPublicNumbers(e, n)
-        pubkey = pub_numbers.public_key(default_backend())
-
-        _DID_WEB_PUBKEY_CACHE[issuer_did] = pubkey
-        return pubkey
+        ttl = _max_age(headers)
+        _DID_WEB_PUBKEY_CACHE[issuer_did] = {
+            "keys": keys,
+            "default": default,
+            "expires": now + (settings.did_web_cache_ttl if ttl is None else ttl),
+            "etag": headers.get("ETag") if headers is not None else None,
+            "miss_at": now if kid and kid not in keys else (entry["miss_at"] if entry else None),
+        }
+        return keys.get(kid) or default
 
     except (urllib.error.URLError, TimeoutError, ValueError, KeyError, json.JSONDecodeError):
         # Red/timeout/formato: devuelve None para permitir fallback (si está habilitado)
@@ -109,7 +256,7 @@ def _resolve_did_web_rsa_pubkey(issuer_did: str) -> object | None:
 
 def sign_vc(payload: dict) -> str:
     key = _load_private_key()
-    return jwt.encode(payload, key, algorithm=settings.jwt_alg)
+    return jwt.encode(payload, key, algorithm=settings.jwt_alg, headers={"kid": signing_kid()})
 
 
 def verify_vc(token: str) -> dict:
@@ -122,16 +269,17 @@ def verify_vc(token: str) -> dict:
         # 1) Decodifica sin verificar para leer 'iss'
         unverified = jwt.decode(token, options={"verify_signature": False})
         iss = unverified.get("iss", "")
+        kid = jwt.get_unverified_header(token).get("kid")
 
         pub = None
         # 2) did:web activado y 'iss' compatible
         if settings.use_did_web and isinstance(iss, str) and iss.startswith("did:web:"):
-            pub = _resolve_did_web_rsa_pubkey(iss)
+            pub = _resolve_did_web_rsa_pubkey(iss, kid)
 
         # 3) Fallback a PEM si no hay pub de did:web o no está activado
         if pub is None:
             if settings.allow_pem_fallback:
-                pub = _load_public_key_pem()
+                pub = _local_public_key(kid)
             else:
                 return {"valid": False, "reason": "no-public-key-available"}
 
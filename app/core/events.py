@@ -0,0 +1,111 @@
+# app/core/events.py
+from __future__ import annotations
+
+from collections import deque
+from typing import AsyncIterator
+import asyncio
+import json
+import time
+import uuid
+
+from app.core import metrics
+
+
+class Subscription:
+    def __init__(self, hub: "EventHub", backlog: list[dict], reset: bool, max_queue: int):
+        self.hub = hub
+        self.backlog = backlog
+        self.reset = reset          # el cliente debe descartar su cache (hueco o reinicio)
+        self.lagged = False         # no ha leído a tiempo y se ha perdido eventos
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue)
+
+    def close(self) -> None:
+        self.hub._subscribers.discard(self)
+
+
+class EventHub:
+    """
+    Hub de difusión en proceso para eventos de estado (emisión/revocación).
+
+    Cada evento lleva un número de secuencia monótono y un id SSE "<epoch>-<seq>";
+    un cliente que reanuda con un id de otro `epoch` (o demasiado antiguo para el
+    histórico) recibe un "reset". Suelto, el hub numera él mismo y `epoch` cambia en
+    cada arranque; en la app lo alimenta app/db/event_log.py con la secuencia de la
+    BD y un `epoch` fijo, igual en todos los workers.
+    """
+
+    def __init__(self, history: int = 4096, max_queue: int = 1024, epoch: str | None = None):
+        self.epoch = epoch or uuid.uuid4().hex[:8]
+        self._seq = 0
+        self._history: deque[dict] = deque(maxlen=history)
+        self._subscribers: set[Subscription] = set()
+        self.max_queue = max_queue
+        self.published = metrics.counter("events_published")
+
+    @property
+    def seq(self) -> int:
+        return self._seq
+
+    def publish(self, type: str, seq: int | None = None, ts: int | None = None, **data) -> dict | None:
+        """Difunde un evento; con `seq` (fuente externa) se ignora si no es posterior al último."""
+        if seq is not None and seq <= self._seq:
+            return None
+        self._seq = self._seq + 1 if seq is None else seq
+        event = {"seq": self._seq, "type": type, "ts": int(time.time()) if ts is None else ts, **data}
+        self._history.append(event)
+        self.published.inc()
+        for sub in list(self._subscribers):
+            try:
+                sub.queue.put_nowait(event)
+            except asyncio.QueueFull:
+                # Suscriptor lento: se le corta; al reconectar reanuda desde su último id
+                sub.lagged = True
+                sub.close()
+        return event
+
+    def subscribe(self, last_event_id: str | None = None) -> Subscription:
+        backlog, reset = [], False
+        if last_event_id:
+            epoch, _, seq = last_event_id.partition("-")
+            try:
+                since = int(seq)
+            except ValueError:
+                since = -1
+            oldest = self._history[0]["seq"] if self._history else self._seq + 1
+            if epoch != self.epoch or since < 0 or since > self._seq or since < oldest - 1:
+                reset = True
+            else:
+                backlog = [e for e in self._history if e["seq"] > since]
+        sub = Subscription(self, backlog, reset, self.max_queue)
+        self._subscribers.add(sub)
+        return sub
+
+    def event_id(self, event: dict) -> str:
+        return f"{self.epoch}-{event['seq']}"
+
+
+def _sse(hub: EventHub, event: dict) -> str:
+    return f"id: {hub.event_id(event)}\nevent: {event['type']}\ndata: {json.dumps(event)}\n\n"
+
+
+async def sse_stream(sub: Subscription, heartbeat: float = 15.0) -> AsyncIterator[str]:
+    """Serializa una suscripción como text/event-stream (con keep-alive periódico)."""
+    hub = sub.hub
+    try:
+        yield "retry: 3000\n\n"
+        if sub.reset:
+            yield _sse(hub, {"seq": hub.seq, "type": "reset", "ts": int(time.time())})
+        for event in sub.backlog:
+            yield _sse(hub, event)
+        while not sub.lagged:
+            try:
+                event = await asyncio.wait_for(sub.queue.get(), heartbeat)
+            except asyncio.TimeoutError:
+                yield ": keepalive\n\n"
+                continue
+            yield _sse(hub, event)
+    finally:
+        sub.close()
+
+
+hub = EventHub()
@@ -0,0 +1,75 @@
+# app/core/metrics.py
+from __future__ import annotations
+
+from bisect import bisect_left
+import threading
+
+
+class Histogram:
+    """
+    Histograma acumulativo muy simple (estilo Prometheus) con buckets fijos.
+    Guarda recuento, suma y recuento por bucket (<= límite superior).
+    """
+
+    def __init__(self, buckets: tuple[float, ...]):
+        self.buckets = tuple(sorted(buckets))
+        self._counts = [0] * (len(self.buckets) + 1)  # último = +Inf
+        self._sum = 0.0
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        idx = bisect_left(self.buckets, value)
+        with self._lock:
+            self._counts[idx] += 1
+            self._sum += value
+            self._count += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            counts = list(self._counts)
+            total, count = self._sum, self._count
+        cumulative, acc = {}, 0
+        for le, c in zip([*map(str, self.buckets), "+Inf"], counts):
+            acc += c
+            cumulative[le] = acc
+        return {"count": count, "sum": total, "buckets": cumulative}
+
+
+class Counter:
+    def __init__(self):
+        self._value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, n: int = 1) -> None:
+        with self._lock:
+            self._value += n
+
+    @property
+    def value(self) -> int:
+        return self._value
+
+    def snapshot(self) -> int:
+        return self._value
+
+
+# Registro global: nombre -> métrica (se expone en GET /metrics)
+_REGISTRY: dict[str, Histogram | Counter] = {}
+
+
+def histogram(name: str, buckets: tuple[float, ...]) -> Histogram:
+    m = _REGISTRY.get(name)
+    if m is None:
+        m = _REGISTRY[name] = Histogram(buckets)
+    return m  # type: ignore[return-value]
+
+
+def counter(name: str) -> Counter:
+    m = _REGISTRY.get(name)
+    if m is None:
+        m = _REGISTRY[name] = Counter()
+    return m  # type: ignore[return-value]
+
+
+def snapshot() -> dict:
+    return {name: m.snapshot() for name, m in sorted(_REGISTRY.items())}
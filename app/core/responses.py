@@ -0,0 +1,51 @@
+# app/core/responses.py
+from __future__ import annotations
+
+from datetime import date, datetime
+from typing import Any
+import json
+
+from fastapi.responses import JSONResponse
+from starlette.middleware.gzip import GZipMiddleware
+
+try:  # opcional: si no está instalado se usa json de la stdlib
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+
+def _default(obj: Any):
+    if isinstance(obj, (datetime, date)):
+        return obj.isoformat()
+    raise TypeError(f"{type(obj).__name__} no serializable")
+
+
+def dumps(content: Any) -> bytes:
+    """JSON compacto en bytes (orjson si está disponible; datetimes en ISO 8601)."""
+    if orjson is not None:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(content, default=_default, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    Respuesta JSON serializada con orjson. Devolverla directamente desde una ruta
+    evita además el paso por jsonable_encoder (datetime, etc. se serializan aquí).
+    """
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+class CompressPathsMiddleware:
+    """gzip negociado (Accept-Encoding) sólo para las rutas indicadas (listados/exports)."""
+
+    def __init__(self, app, paths: set[str], minimum_size: int = 1024, compresslevel: int = 6):
+        self.app = app
+        self.paths = paths
+        self.gzip = GZipMiddleware(app, minimum_size=minimum_size, compresslevel=compresslevel)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and scope.get("path") in self.paths:
+            return await self.gzip(scope, receive, send)
+        return await self.app(scope, receive, send)
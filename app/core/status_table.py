@@ -0,0 +1,175 @@
+# app/core/status_table.py
+from __future__ import annotations
+
+from pathlib import Path
+import hashlib
+import mmap
+import os
+import struct
+import threading
+import time
+
+from app.core import metrics
+from app.core.config import settings
+
+try:  # bloqueo entre procesos (no existe en Windows: allí sólo se protege el propio proceso)
+    import fcntl
+except ImportError:  # pragma: no cover
+    fcntl = None
+
+_MAGIC = b"DAPSTAT1"
+_HEADER = struct.Struct("<8sQQQ")   # magic, capacity, generation, count
+_SLOT = struct.Struct("<QqB7x")     # clave (hash jti, 0 = libre), exp, status
+_GEN_OFFSET = 16
+_STATUS_CODES = {"valid": 1, "revoked": 2}
+_STATUS_NAMES = {v: k for k, v in _STATUS_CODES.items()}
+_READ_RETRIES = 16
+
+
+def _key(jti: str) -> int:
+    k = int.from_bytes(hashlib.blake2b(jti.encode(), digest_size=8).digest(), "little")
+    return k or 1
+
+
+class StatusTable:
+    """
+    Tabla jti -> (status, exp) en un fichero mapeado en memoria, compartida por todos
+    los workers de uvicorn de la máquina (una sola copia caliente, tamaño fijo).
+
+    Hash abierto con sondeo lineal sobre slots de 24 bytes. Escrituras serializadas
+    con flock; lecturas sin bloqueo con un seqlock: el contador `generation` es impar
+    mientras se escribe, y el lector reintenta si cambia durante su lectura.
+    Es una cache: si un jti no está (o la tabla está llena) se consulta la BD.
+    Los slots de credenciales ya caducadas (exp pasado) se reutilizan al insertar, así
+    que el fichero (persistente entre reinicios) no se llena con jti históricos.
+    """
+
+    def __init__(self, path: str | Path, capacity: int):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT | getattr(os, "O_BINARY", 0), 0o644)
+        self._flock(True)
+        try:
+            size = os.fstat(self._fd).st_size
+            if size < _HEADER.size:
+                os.ftruncate(self._fd, _HEADER.size + capacity * _SLOT.size)
+                os.lseek(self._fd, 0, os.SEEK_SET)
+                os.write(self._fd, _HEADER.pack(_MAGIC, capacity, 0, 0))
+            os.lseek(self._fd, 0, os.SEEK_SET)
+            magic, self.capacity, _, _ = _HEADER.unpack(os.read(self._fd, _HEADER.size))
+            if magic != _MAGIC:
+                raise ValueError(f"{self.path} no es una tabla de estados")
+        finally:
+            self._flock(False)
+        self._mm = mmap.mmap(self._fd, _HEADER.size + self.capacity * _SLOT.size)
+        self.rejected = metrics.counter("status_table_rejected")
+        self.reclaimed = metrics.counter("status_table_reclaimed")
+
+    def _flock(self, lock: bool) -> None:
+        if fcntl is not None:
+            fcntl.flock(self._fd, fcntl.LOCK_EX if lock else fcntl.LOCK_UN)
+
+    @property
+    def generation(self) -> int:
+        return struct.unpack_from("<Q", self._mm, _GEN_OFFSET)[0]
+
+    @property
+    def count(self) -> int:
+        return _HEADER.unpack_from(self._mm, 0)[3]
+
+    def _probe(self, key: int, expired_before: int | None = None) -> tuple[int, bool, int]:
+        """
+        (offset del slot, encontrado, offset del primer slot caducado en el camino o -1).
+        Offset -1 si la tabla está llena. Los caducados sólo se buscan si se pasa
+        `expired_before` (escrituras).
+        """
+        idx = key % self.capacity
+        expired = -1
+        for _ in range(self.capacity):
+            off = _HEADER.size + idx * _SLOT.size
+            k, exp, _ = _SLOT.unpack_from(self._mm, off)
+            if k == key:
+                return off, True, expired
+            if k == 0:
+                return off, False, expired
+            if expired < 0 and expired_before is not None and exp < expired_before:
+                expired = off
+            idx = (idx + 1) % self.capacity
+        return -1, False, expired
+
+    def get(self, jti: str) -> tuple[str, int] | None:
+        """Lectura sin bloqueo: (status, exp) o None si no está (o no hay lectura estable)."""
+        key = _key(jti)
+        for _ in range(_READ_RETRIES):
+            g1 = self.generation
+            if g1 & 1:
+                continue
+            off, found, _ = self._probe(key)
+            result = None
+            if found:
+                _, exp, code = _SLOT.unpack_from(self._mm, off)
+                result = (_STATUS_NAMES.get(code, "unknown"), exp)
+            if self.generation == g1:
+                return result
+        return None
+
+    def put(self, jti: str, status: str, exp: int) -> bool:
+        """Escritura de issuer/revoke. "revoked" es terminal: nunca vuelve a "valid"."""
+        return self._write(jti, status, exp, overwrite=True)
+
+    def put_if_absent(self, jti: str, status: str, exp: int) -> bool:
+        """
+        Relleno desde la BD (read-through): sólo inserta, nunca pisa un slot existente.
+        Así un "valid" leído antes de una revocación concurrente no la deshace.
+        """
+        return self._write(jti, status, exp, overwrite=False)
+
+    def _write(self, jti: str, status: str, exp: int, overwrite: bool) -> bool:
+        key = _key(jti)
+        code = _STATUS_CODES.get(status, 0)
+        with self._lock:
+            self._flock(True)
+            try:
+                off, found, expired = self._probe(key, expired_before=int(time.time()))
+                if found:
+                    current = _SLOT.unpack_from(self._mm, off)[2]
+                    if not overwrite or (current == _STATUS_CODES["revoked"] and code != current):
+                        return False
+                    reuse = False
+                else:
+                    # Mejor un slot caducado que uno libre: no crece `count`
+                    reuse = expired >= 0
+                    if reuse:
+                        off = expired
+                    elif off < 0 or self.count >= self.capacity * 0.9:
+                        self.rejected.inc()  # llena: los lectores irán a la BD
+                        return False
+                gen = self.generation
+                struct.pack_into("<Q", self._mm, _GEN_OFFSET, gen + 1)
+                _SLOT.pack_into(self._mm, off, key, exp, code)
+                if reuse:
+                    self.reclaimed.inc()
+                elif not found:
+                    struct.pack_into("<Q", self._mm, _GEN_OFFSET + 8, self.count + 1)
+                struct.pack_into("<Q", self._mm, _GEN_OFFSET, gen + 2)
+                return True
+            finally:
+                self._flock(False)
+
+    def close(self) -> None:
+        self._mm.close()
+        os.close(self._fd)
+
+
+_TABLE: StatusTable | None = None
+
+
+def status_table() -> StatusTable | None:
+    """Tabla del host (STATUS_TABLE_PATH) o None si está desactivada."""
+    global _TABLE
+    path = settings.status_table_path
+    if not path:
+        return None
+    if _TABLE is None or _TABLE.path != Path(path):
+        _TABLE = StatusTable(path, settings.status_table_capacity)
+    return _TABLE
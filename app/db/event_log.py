@@ -0,0 +1,128 @@
+# app/db/event_log.py
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import time
+
+from sqlalchemy import delete, func, select
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from app.core import metrics
+from app.core.config import settings
+from app.core.events import EventHub, hub
+from app.db.models import StatusEvent
+from app.db.session import SessionLocal
+
+_BATCH = 1000
+_PRUNE_EVERY_S = 60.0
+
+
+def status_event(type: str, jti: str, status: str, exp: int | None = None, reason: str | None = None) -> StatusEvent:
+    """Fila del registro de eventos: se guarda en la misma transacción que el cambio de estado."""
+    return StatusEvent(type=type, jti=jti, status=status, exp=exp, reason=reason, ts=int(time.time()))
+
+
+class EventLog:
+    """
+    Alimenta el hub SSE de este proceso desde la tabla status_events, común a todos
+    los workers.
+
+    Cada worker la sondea cada `poll_ms` y difunde en orden de `seq` con el mismo
+    `epoch` (derivado de la BD), así que un gate conectado a cualquier worker recibe
+    las revocaciones hechas en todos y puede reanudar (Last-Event-ID) contra otro.
+    Tras un cambio propio se llama a `sync(seq)`, que sondea al momento: en el worker
+    que emite/revoca el evento sale sin esperar al sondeo. Se conservan las últimas
+    `keep` filas. Supone que los `seq` hacen commit en orden (SQLite serializa las
+    escrituras).
+    """
+
+    def __init__(self, session_factory: async_sessionmaker, hub: EventHub, poll_ms: float, keep: int):
+        self._session_factory = session_factory
+        self.hub = hub
+        self.poll_s = max(0.01, poll_ms / 1000)
+        self.keep = keep
+        self._lock: asyncio.Lock | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._task: asyncio.Task | None = None
+        self.polls = metrics.counter("event_log_polls")
+
+    def _get_lock(self) -> asyncio.Lock:
+        loop = asyncio.get_running_loop()
+        if self._lock is None or self._loop is not loop:
+            self._loop = loop
+            self._lock = asyncio.Lock()
+        return self._lock
+
+    async def _publish_after(self, after: int) -> int:
+        async with self._session_factory() as s:
+            rows = (await s.execute(
+                select(StatusEvent).where(StatusEvent.seq > after).order_by(StatusEvent.seq).limit(_BATCH)
+            )).scalars().all()
+        for r in rows:
+            data = {"jti": r.jti, "status": r.status}
+            if r.exp is not None:
+                data["exp"] = r.exp
+            if r.type == "revoked":
+                data["reason"] = r.reason
+            self.hub.publish(r.type, seq=r.seq, ts=r.ts, **data)
+        return len(rows)
+
+    async def poll(self) -> None:
+        """Difunde en orden todo lo registrado después del último evento del hub."""
+        async with self._get_lock():
+            self.polls.inc()
+            while await self._publish_after(self.hub.seq) == _BATCH:
+                pass
+
+    async def sync(self, seq: int) -> None:
+        """Espera a que el evento `seq` (recién guardado) se haya difundido."""
+        if self.hub.seq < seq:
+            await self.poll()
+
+    async def start(self) -> None:
+        """Arranque: epoch común, histórico reciente cargado y sondeo periódico."""
+        self.hub.epoch = hashlib.sha256(settings.db_url.encode()).hexdigest()[:8]
+        async with self._session_factory() as s:
+            last = (await s.execute(select(func.max(StatusEvent.seq)))).scalar_one() or 0
+        if self.hub.seq < last:
+            async with self._get_lock():
+                after = max(self.hub.seq, last - (self.hub._history.maxlen or 0))
+                while await self._publish_after(after) == _BATCH:
+                    after = self.hub.seq
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def _run(self) -> None:
+        last_prune = time.monotonic()
+        while True:
+            await asyncio.sleep(self.poll_s)
+            try:
+                await self.poll()
+                if self.keep > 0 and time.monotonic() - last_prune > _PRUNE_EVERY_S:
+                    last_prune = time.monotonic()
+                    async with self._session_factory() as s:
+                        await s.execute(delete(StatusEvent).where(StatusEvent.seq <= self.hub.seq - self.keep))
+                        await s.commit()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                # BD no disponible un momento: se reintenta en el siguiente sondeo
+                continue
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+
+event_log = EventLog(
+    SessionLocal,
+    hub,
+    poll_ms=settings.events_poll_ms,
+    keep=settings.events_log_keep,
+)
@@ -1,6 +1,6 @@
 ﻿# app/db/models.py
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column
-from sqlalchemy import String, Text, Integer, DateTime
+from sqlalchemy import String, Text, Integer, DateTime, inspect, text
 from datetime import datetime, timezone
 
 class Base(DeclarativeBase):
@@ -20,3 +20,49 @@ class Credential(Base):
 
     exp: Mapped[int] = mapped_column(Integer)
     status: Mapped[str] = mapped_column(String(16), default="valid")
+
+    # Partición lógica: evento (event.id o slug-fecha) y temporada (año)
+    event: Mapped[str | None] = mapped_column(String(64), index=True, nullable=True)
+    season: Mapped[str | None] = mapped_column(String(8), index=True, nullable=True)
+
+    # Hash de la clave de idempotencia (Idempotency-Key o athleteDid + event.id) y del
+    # cuerpo de la petición; las naturales ("nat:...") se vacían al revocar para poder
+    # volver a emitir, una Idempotency-Key sigue ligada a su credencial
+    idem_key: Mapped[str | None] = mapped_column(String(64), unique=True, index=True, nullable=True)
+    idem_body_hash: Mapped[str | None] = mapped_column(String(64), nullable=True)
+
+
+class StatusEvent(Base):
+    """
+    Registro de cambios de estado (emisión/revocación) compartido entre workers:
+    `seq` es la secuencia global de los eventos SSE de /verifier/events.
+    """
+    __tablename__ = "status_events"
+
+    seq: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    type: Mapped[str] = mapped_column(String(16))
+    jti: Mapped[str] = mapped_column(String(64))
+    status: Mapped[str] = mapped_column(String(16))
+    exp: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    reason: Mapped[str | None] = mapped_column(String(255), nullable=True)
+    ts: Mapped[int] = mapped_column(Integer)
+
+
+def upgrade_schema(conn) -> None:
+    """
+    create_all no modifica tablas ya existentes: añade las columnas nuevas (nullable)
+    y los índices que falten, para no tener que borrar una BD local tras actualizar.
+    """
+    insp = inspect(conn)
+    for table in Base.metadata.sorted_tables:
+        if not insp.has_table(table.name):
+            continue
+        have = {c["name"] for c in insp.get_columns(table.name)}
+        for col in table.columns:
+            if col.name not in have:
+                coltype = col.type.compile(dialect=conn.dialect)
+                conn.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {col.name} {coltype}"))
+        have_idx = {i["name"] for i in insp.get_indexes(table.name)}
+        for idx in table.indexes:
+            if idx.name not in have_idx:
+                idx.create(conn)
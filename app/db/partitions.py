@@ -0,0 +1,200 @@
+# app/db/partitions.py
+from __future__ import annotations
+
+from collections import OrderedDict
+import asyncio
+import hashlib
+import re
+import time
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from app.core import metrics
+from app.core.config import settings
+from app.db.models import Credential
+from app.db.session import SessionLocal
+
+_JTI_PREFIX = "vc-hyrox-"
+_CODE_LEN = 6
+
+
+# ---------- partición lógica por evento / temporada ----------
+
+def event_key(event: dict) -> str | None:
+    """Clave de partición del evento: event.id o, si no hay, slug(nombre)-fecha."""
+    if event.get("id") is not None:
+        return str(event["id"])[:64]
+    name = event.get("name")
+    if not name:
+        return None
+    slug = re.sub(r"[^a-z0-9]+", "-", str(name).lower()).strip("-")
+    return f"{slug}-{event.get('date', '')}".strip("-")[:64]
+
+
+def event_season(event: dict) -> str:
+    """Temporada (año) del evento según event.date; si no hay, la del año en curso."""
+    date = str(event.get("date", ""))
+    return date[:4] if re.match(r"\d{4}", date) else time.strftime("%Y")
+
+
+def event_code(key: str) -> str:
+    return hashlib.sha256(key.encode()).hexdigest()[:_CODE_LEN]
+
+
+def jti_prefix(key: str | None) -> str:
+    """Prefijo de jti que enruta al evento: vc-hyrox-<código>-"""
+    return f"{_JTI_PREFIX}{event_code(key)}-" if key else _JTI_PREFIX
+
+
+def jti_event_code(jti: str) -> str | None:
+    """Código de evento de un jti (None en jti antiguos sin código)."""
+    parts = jti.split("-")
+    if len(parts) == 4 and jti.startswith(_JTI_PREFIX) and len(parts[2]) == _CODE_LEN:
+        return parts[2]
+    return None
+
+
+# ---------- hot set del evento en curso ----------
+
+class _Partition:
+    def __init__(self, key: str, rows: dict[str, list]):
+        self.key = key
+        self.rows = rows  # jti -> [status, exp]
+        self.loaded_at = time.monotonic()
+        self.refreshing = False
+
+
+class EventHotSet:
+    """
+    Estados (status, exp) en memoria de las credenciales de los eventos con tráfico
+    (día de evento); el JWT no se guarda, para no multiplicar la memoria por fila.
+
+    Las búsquedas se enrutan por el código de evento del jti. El primer fallo de un
+    evento dispara en segundo plano la carga de toda su partición (si no supera
+    `max_rows`); se mantienen como mucho `max_events` eventos (LRU, 0 = desactivado).
+
+    Coherencia: las revocaciones de este proceso se aplican al momento; las de otros
+    procesos (workers) sólo al releer los estados, cada `refresh_s` segundos. Una
+    partición más vieja que eso no responde (se va a la BD) hasta que termina su
+    refresco, pero dentro de esa ventana una revocación de otro worker NO se ve:
+    puede responderse "valid" hasta `refresh_s` segundos después de revocar.
+    """
+
+    def __init__(self, session_factory: async_sessionmaker, max_events: int, max_rows: int, refresh_s: float):
+        self._session_factory = session_factory
+        self.max_events = max_events
+        self.max_rows = max_rows
+        self.refresh_s = refresh_s
+        self._parts: OrderedDict[str, _Partition] = OrderedDict()   # código -> partición
+        self._loading: set[str] = set()
+        self._pending: dict[str, dict[str, str]] = {}   # revocaciones durante una carga
+        self._tasks: set[asyncio.Task] = set()
+        self.hits = metrics.counter("hotset_hits")
+        self.misses = metrics.counter("hotset_misses")
+        self.loads = metrics.counter("hotset_loads")
+
+    def _spawn(self, coro) -> None:
+        task = asyncio.get_running_loop().create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    def lookup(self, jti: str) -> tuple[str, int] | None:
+        """(status, exp) si el evento del jti está caliente y al día; None -> ir a la BD."""
+        code = jti_event_code(jti)
+        part = self._parts.get(code) if code else None
+        if part is None:
+            return None
+        self._parts.move_to_end(code)
+        if time.monotonic() - part.loaded_at > self.refresh_s:
+            # Podría no ver una revocación de otro worker: la BD decide hasta refrescar
+            if not part.refreshing:
+                self._spawn(self._refresh(code))
+                part.refreshing = True
+            self.misses.inc()
+            return None
+        row = part.rows.get(jti)
+        if row is None:
+            # Emitida en otro proceso después de la carga: la BD decide
+            self.misses.inc()
+            return None
+        self.hits.inc()
+        return row[0], row[1]
+
+    def note_miss(self, jti: str, event: str | None) -> None:
+        """Tras leer de BD: si el jti enruta a ese evento, carga su partición en segundo plano."""
+        code = jti_event_code(jti)
+        if not event or code is None or code != event_code(event):
+            return
+        if code in self._parts or code in self._loading or self.max_events <= 0:
+            return
+        self._loading.add(code)
+        self._spawn(self.load(event))
+
+    async def load(self, event: str) -> bool:
+        code = event_code(event)
+        try:
+            async with self._session_factory() as s:
+                n = (await s.execute(
+                    select(func.count()).select_from(Credential).where(Credential.event == event)
+                )).scalar_one()
+                if n > self.max_rows:
+                    return False
+                res = await s.execute(
+                    select(Credential.jti, Credential.status, Credential.exp)
+                    .where(Credential.event == event)
+                )
+                rows = {r.jti: [r.status, r.exp] for r in res}
+            for jti, status in self._pending.pop(code, {}).items():
+                if jti in rows:
+                    rows[jti][0] = status
+            self._parts[code] = _Partition(event, rows)
+            self._parts.move_to_end(code)
+            while len(self._parts) > self.max_events:
+                self._parts.popitem(last=False)
+            self.loads.inc()
+            return True
+        finally:
+            self._loading.discard(code)
+            self._pending.pop(code, None)
+
+    async def _refresh(self, code: str) -> None:
+        part = self._parts.get(code)
+        if part is None:
+            return
+        try:
+            async with self._session_factory() as s:
+                res = await s.execute(
+                    select(Credential.jti, Credential.status)
+                    .where(Credential.event == part.key, Credential.status != "valid")
+                )
+                for jti, status in res:
+                    row = part.rows.get(jti)
+                    if row is not None:
+                        row[0] = status
+            part.loaded_at = time.monotonic()
+        finally:
+            part.refreshing = False
+
+    def add(self, jti: str, status: str, exp: int) -> None:
+        code = jti_event_code(jti)
+        part = self._parts.get(code) if code else None
+        if part is not None:
+            part.rows[jti] = [status, exp]
+
+    def set_status(self, jti: str, status: str) -> None:
+        code = jti_event_code(jti)
+        if code in self._loading:
+            self._pending.setdefault(code, {})[jti] = status
+        part = self._parts.get(code) if code else None
+        row = part.rows.get(jti) if part is not None else None
+        if row is not None:
+            row[0] = status
+
+
+hot_set = EventHotSet(
+    SessionLocal,
+    max_events=settings.hotset_max_events,
+    max_rows=settings.hotset_max_rows,
+    refresh_s=settings.hotset_refresh_s,
+)
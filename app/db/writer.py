@@ -0,0 +1,126 @@
+# app/db/writer.py
+from __future__ import annotations
+
+import asyncio
+import time
+
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from app.core import metrics
+from app.core.config import settings
+from app.db.models import Credential
+from app.db.session import SessionLocal
+
+_FLUSH_SIZE = metrics.histogram("writer_flush_size", (1, 2, 4, 8, 16, 32, 64, 128, 256))
+_FLUSH_LATENCY_MS = metrics.histogram(
+    "writer_flush_latency_ms", (0.5, 1, 2, 5, 10, 25, 50, 100, 250, 1000)
+)
+
+
+class CredentialWriter:
+    """
+    Group-commit de inserciones de credenciales.
+
+    Las peticiones concurrentes encolan su fila y esperan; una única tarea escritora
+    agrupa lo que haya en cola (hasta `max_batch` filas o `max_delay_ms` de espera)
+    y lo guarda en UNA transacción. Cada petición recibe respuesta sólo cuando su
+    lote ha hecho commit, así que la durabilidad es la misma que con un commit por fila.
+    """
+
+    def __init__(self, session_factory: async_sessionmaker, max_batch: int, max_delay_ms: float):
+        self._session_factory = session_factory
+        self.max_batch = max(1, max_batch)
+        self.max_delay = max(0.0, max_delay_ms) / 1000
+        self._queue: asyncio.Queue | None = None
+        self._task: asyncio.Task | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+
+    def _ensure_started(self) -> asyncio.Queue:
+        loop = asyncio.get_running_loop()
+        # Arranque perezoso (y reinicio si cambia el event loop, p.ej. en tests/CLI)
+        if self._task is None or self._task.done() or self._loop is not loop:
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._task = loop.create_task(self._run())
+        return self._queue
+
+    async def add(self, cred: Credential, *related) -> None:
+        """
+        Encola la fila (y filas relacionadas, p.ej. su evento de estado, que van en
+        la misma transacción) y espera a que su lote haya hecho commit.
+        """
+        queue = self._ensure_started()
+        fut = asyncio.get_running_loop().create_future()
+        queue.put_nowait(((cred, *related), fut))
+        await fut
+
+    async def _run(self) -> None:
+        queue = self._queue
+        loop = asyncio.get_running_loop()
+        stopping = False
+        while not stopping:
+            item = await queue.get()
+            if item is None:  # centinela de stop()
+                return
+            batch = [item]
+            deadline = loop.time() + self.max_delay
+            while len(batch) < self.max_batch:
+                try:
+                    item = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    timeout = deadline - loop.time()
+                    if timeout <= 0:
+                        break
+                    try:
+                        item = await asyncio.wait_for(queue.get(), timeout)
+                    except asyncio.TimeoutError:
+                        break
+                if item is None:
+                    stopping = True
+                    break
+                batch.append(item)
+            await self._flush(batch)
+
+    async def _flush(self, batch: list[tuple[tuple, asyncio.Future]]) -> None:
+        t0 = time.perf_counter()
+        try:
+            async with self._session_factory() as s:
+                s.add_all([row for rows, _ in batch for row in rows])
+                await s.commit()
+        except Exception:
+            # Si el lote falla (p.ej. una fila viola una restricción), se reintenta
+            # fila a fila para que sólo falle la petición culpable.
+            for rows, fut in batch:
+                try:
+                    async with self._session_factory() as s:
+                        s.add_all(rows)
+                        await s.commit()
+                except Exception as e:
+                    if not fut.done():
+                        fut.set_exception(e)
+                else:
+                    if not fut.done():
+                        fut.set_result(None)
+        else:
+            for _, fut in batch:
+                if not fut.done():
+                    fut.set_result(None)
+        _FLUSH_SIZE.observe(len(batch))
+        _FLUSH_LATENCY_MS.observe((time.perf_counter() - t0) * 1000)
+
+    async def stop(self) -> None:
+        """Vacía lo pendiente y detiene la tarea escritora (shutdown)."""
+        if self._task is None or self._task.done():
+            return
+        if self._loop is not asyncio.get_running_loop():
+            return
+        self._queue.put_nowait(None)
+        await self._task
+        self._task = None
+
+
+credential_writer = CredentialWriter(
+    SessionLocal,
+    max_batch=settings.write_batch_max,
+    max_delay_ms=settings.write_batch_delay_ms,
+)
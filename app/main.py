@@ -5,25 +5,61 @@ from contextlib import asynccontextmanager
 from app.api.issuer import router as issuer_router
 from app.api.verifier import router as verifier_router
 from app.api.holder import router as holder_router
+from app.api.wellknown import router as wellknown_router
 
+from app.core import metrics
+from app.core.admission import AdmissionMiddleware, default_routes
+from app.core.config import settings
+from app.core.responses import CompressPathsMiddleware, FastJSONResponse
 from app.db.session import engine
-from app.db.models import Base
+from app.db.models import Base, upgrade_schema
+from app.db.writer import credential_writer
+from app.db.event_log import event_log
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # === STARTUP ===
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
+        await conn.run_sync(upgrade_schema)
+    await event_log.start()
     yield
     # === SHUTDOWN (opcional) ===
+    await event_log.stop()
+    await credential_writer.stop()
     await engine.dispose()
 
-app = FastAPI(title="DAP HYROX TFG (Py3.13)", lifespan=lifespan)
+app = FastAPI(
+    title="DAP HYROX TFG (Py3.13)",
+    lifespan=lifespan,
+    default_response_class=FastJSONResponse,
+)
+
+# gzip negociado en listados por encima de GZIP_MIN_SIZE bytes
+app.add_middleware(
+    CompressPathsMiddleware,
+    paths={"/issuer/list", "/holder/credentials"},
+    minimum_size=settings.gzip_min_size,
+)
+
+if settings.admission_enabled:
+    app.add_middleware(
+        AdmissionMiddleware,
+        routes=default_routes(),
+        client_rate=settings.admission_client_rate,
+        client_burst=settings.admission_client_burst,
+        client_header=settings.admission_client_header,
+    )
 
 app.include_router(issuer_router, prefix="/issuer", tags=["issuer"])
 app.include_router(verifier_router, prefix="/verifier", tags=["verifier"])
 app.include_router(holder_router,   prefix="/holder",   tags=["holder"])
+app.include_router(wellknown_router, prefix="/.well-known", tags=["did"])
 
 @app.get("/")
 def root():
     return {"ok": True}
+
+@app.get("/metrics")
+def get_metrics():
+    return metrics.snapshot()
@@ -40,8 +40,10 @@ def _prepare_test_env() -> None:
     tmp = (ROOT / ".pytest_tmp").absolute()
     tmp.mkdir(exist_ok=True)
 
-    # BD SQLite temporal para pruebas
-    db_path = (tmp / "test.sqlite3").as_posix()
+    # BD SQLite temporal para pruebas (nueva en cada sesión: el esquema puede cambiar)
+    db_file = tmp / "test.sqlite3"
+    db_file.unlink(missing_ok=True)
+    db_path = db_file.as_posix()
     os.environ["DB_URL"] = f"sqlite+aiosqlite:///{db_path}"
 
     # Variables mínimas para que Settings funcione sin .env
@@ -55,6 +57,10 @@ def _prepare_test_env() -> None:
     os.environ["ISSUER_PUBLIC_KEY_PATH"]  = pub_path.as_posix()
 
 
+# Antes de que los módulos de test importen 'app' (Settings se instancia al importar)
+_prepare_test_env()
+
+
 @pytest.fixture(scope="session")
 def client():
     """
@@ -63,7 +69,6 @@ def client():
     - Claves RSA generadas al vuelo en .pytest_tmp/
     - ENV configurado sin depender de .env ni keys/
     """
-    _prepare_test_env()
     from app.main import app
     # Con 'with' forzamos lifespan: crea tablas en startup y cierra engine en shutdown
     with TestClient(app) as c:
@@ -0,0 +1,84 @@
+# tests/test_admission.py
+import asyncio
+
+import httpx
+from fastapi import FastAPI
+
+from app.core.admission import AdmissionMiddleware, Lane
+
+
+def _slow_app(routes, **kw) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/slow")
+    async def slow():
+        await asyncio.sleep(0.3)
+        return {"ok": True}
+
+    @app.get("/fast")
+    async def fast():
+        return {"ok": True}
+
+    app.add_middleware(AdmissionMiddleware, routes=routes, **kw)
+    return app
+
+
+async def _get_many(app, paths):
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as c:
+        async def _get(path, delay):
+            await asyncio.sleep(delay)
+            return await c.get(path)
+        return await asyncio.gather(*(_get(p, d) for p, d in paths))
+
+
+def test_queue_over_latency_budget_is_shed_with_503():
+    lane = Lane("t_slow", limit=1, budget_ms=50)
+    app = _slow_app({"/slow": lane})
+
+    first, second = asyncio.run(_get_many(app, [("/slow", 0), ("/slow", 0.01)]))
+    assert first.status_code == 200
+    assert second.status_code == 503
+    assert int(second.headers["retry-after"]) >= 1
+    assert lane.queued.value >= 1 and lane.shed.value >= 1
+
+
+def test_low_priority_lane_yields_to_queued_high_priority():
+    high = Lane("t_high", limit=1, priority=0, budget_ms=1000)
+    low = Lane("t_low", limit=8, priority=1, budget_ms=1000)
+    app = _slow_app({"/slow": high, "/fast": low})
+
+    # 1ª ocupa el carril prioritario, 2ª queda en cola, el listado se descarta al instante
+    a, b, c = asyncio.run(_get_many(app, [("/slow", 0), ("/slow", 0.01), ("/fast", 0.05)]))
+    assert a.status_code == 200 and b.status_code == 200
+    assert c.status_code == 503
+
+
+def test_per_client_token_bucket_returns_429():
+    app = _slow_app({"/fast": Lane("t_rate", limit=8)}, client_rate=0.5, client_burst=2)
+
+    codes = [r.status_code for r in asyncio.run(_get_many(app, [("/fast", 0)] * 3))]
+    assert sorted(codes) == [200, 200, 429]
+
+
+def test_client_bucket_keyed_on_trusted_forwarded_header():
+    app = _slow_app({"/fast": Lane("t_fwd", limit=8)}, client_rate=0.5, client_burst=1,
+                    client_header="X-Forwarded-For")
+
+    async def _run():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as c:
+            # Mismo socket (proxy), distintos clientes: cada uno con su bucket
+            out = []
+            for fwd in ["1.1.1.1", "spoofed, 2.2.2.2", "9.9.9.9, 2.2.2.2", "1.1.1.1"]:
+                out.append((await c.get("/fast", headers={"X-Forwarded-For": fwd})).status_code)
+            return out
+
+    assert asyncio.run(_run()) == [200, 200, 429, 429]
+
+
+def test_admission_counters_exposed_in_metrics(client):
+    assert client.get("/issuer/list").status_code == 200
+    m = client.get("/metrics").json()
+    assert m["admission_list_admitted"] >= 1
+    assert "admission_issue_shed" in m and "admission_verify_queued" in m
@@ -160,3 +160,150 @@ def test_did_web_network_error_without_fallback(monkeypatch, client):
     settings.use_did_web = False
     settings.allow_pem_fallback = True
     settings.issuer_did = "did:example:issuerHYX"
+
+
+def test_wellknown_did_json_and_jwks_match_token_kid(client):
+    """El did.json/JWKS servidos por la app contienen el 'kid' que lleva la cabecera del JWT."""
+    import jwt as pyjwt
+
+    r = client.post("/issuer/issue", json={
+        "athleteDid": "did:example:athlete123",
+        "name": "Nombre Apellido",
+        "event": {"name": "HYROX Barcelona", "date": "2025-11-15", "division": "Pro Men", "category": "Individual"},
+        "result": {"totalTime": "01:05:23", "splits": {"run1": "00:04:15"}},
+        "expDays": 30
+    })
+    kid = pyjwt.get_unverified_header(r.json()["token"])["kid"]
+
+    d = client.get("/.well-known/did.json")
+    assert d.status_code == 200
+    doc = d.json()
+    assert doc["id"] == settings.issuer_did
+    assert doc["assertionMethod"][0] == f"{settings.issuer_did}#{kid}"
+    assert doc["verificationMethod"][0]["publicKeyJwk"]["kid"] == kid
+
+    j = client.get("/.well-known/jwks.json")
+    assert j.status_code == 200
+    assert [k["kid"] for k in j.json()["keys"]] == [kid]
+
+    # Cacheable: ETag + Cache-Control, y 304 con If-None-Match
+    etag = d.headers["etag"]
+    assert "max-age=" in d.headers["cache-control"]
+    r304 = client.get("/.well-known/did.json", headers={"If-None-Match": etag})
+    assert r304.status_code == 304
+    assert r304.content == b""
+
+
+def test_did_web_resolves_own_did_json_with_rotation_and_max_age(monkeypatch, client, tmp_path):
+    """
+    Rotación: una clave extra activa aparece en el did.json; el resolver elige por 'kid'
+    y respeta Cache-Control: max-age=0 (vuelve a descargar en cada verificación).
+    """
+    from cryptography.hazmat.primitives.asymmetric import rsa
+    from cryptography.hazmat.primitives import serialization
+    from app.core import crypto as c
+
+    old = rsa.generate_private_key(public_exponent=65537, key_size=2048).public_key()
+    old_path = tmp_path / "old_public.pem"
+    old_path.write_bytes(old.public_bytes(
+        encoding=serialization.Encoding.PEM,
+        format=serialization.PublicFormat.SubjectPublicKeyInfo,
+    ))
+    monkeypatch.setattr(settings, "extra_pub_key_paths", old_path.as_posix())
+
+    issuer = "did:web:rotation.example"
+    settings.use_did_web = True
+    settings.allow_pem_fallback = False
+    settings.issuer_did = issuer
+    c._DID_WEB_PUBKEY_CACHE.clear()
+
+    body = client.get("/.well-known/did.json").content
+    assert len(json.loads(body)["verificationMethod"]) == 2
+
+    calls = []
+
+    class _Resp:
+        headers = {"Cache-Control": "public, max-age=0", "ETag": '"v1"'}
+        def read(self): return body
+        def __enter__(self): return self
+        def __exit__(self, exc_type, exc, tb): return False
+
+    def _urlopen(req, timeout=5):
+        calls.append(req)
+        return _Resp()
+
+    from urllib import request as _req
+    monkeypatch.setattr(_req, "urlopen", _urlopen)
+
+    r = client.post("/issuer/issue", json={
+        "athleteDid": "did:example:athlete123",
+        "name": "Nombre Apellido",
+        "event": {"name": "HYROX Barcelona", "date": "2025-11-15", "division": "Pro Men", "category": "Individual"},
+        "result": {"totalTime": "01:05:23", "splits": {"run1": "00:04:15"}},
+        "expDays": 30
+    })
+    token = r.json()["token"]
+
+    for _ in range(2):
+        vr = client.post("/verifier/verify", json={"token": token})
+        assert vr.json()["valid"] is True
+    assert len(calls) == 2
+    assert calls[1].get_header("If-none-match") == '"v1"'
+
+    c._DID_WEB_PUBKEY_CACHE.clear()
+
+
+def test_verifier_without_private_key(monkeypatch, client, tmp_path):
+    """Un verificador sólo con la clave pública verifica por 'kid' y sirve did.json."""
+    r = client.post("/issuer/issue", json={
+        "athleteDid": "did:example:athlete123",
+        "name": "Nombre Apellido",
+        "event": {"name": "HYROX Barcelona", "date": "2025-11-15", "division": "Pro Men", "category": "Individual"},
+        "result": {"totalTime": "01:05:23", "splits": {"run1": "00:04:15"}},
+        "expDays": 30
+    })
+    token = r.json()["token"]
+
+    monkeypatch.setattr(settings, "priv_key_path", (tmp_path / "missing_private.pem").as_posix())
+    assert client.post("/verifier/verify", json={"token": token}).json()["valid"] is True
+    d = client.get("/.well-known/did.json")
+    assert d.status_code == 200
+    assert len(d.json()["verificationMethod"]) == 1
+
+
+def test_unknown_kid_refetch_is_rate_limited(monkeypatch):
+    """'kid' aleatorios no provocan una descarga por token ni hacen crecer _JWK_CACHE."""
+    import uuid
+    from app.core import crypto as c
+
+    issuer = "did:web:attacker.example"
+    doc = json.dumps(_fake_didjson_for_current_pem(issuer)).encode()
+    calls = []
+
+    class _Resp:
+        headers = {"Cache-Control": "max-age=0"}
+        def read(self): return doc
+        def __enter__(self): return self
+        def __exit__(self, exc_type, exc, tb): return False
+
+    def _urlopen(req, timeout=5):
+        calls.append(req)
+        return _Resp()
+
+    from urllib import request as _req
+    monkeypatch.setattr(_req, "urlopen", _urlopen)
+    monkeypatch.setattr(settings, "did_web_refetch_interval", 60)
+    c._DID_WEB_PUBKEY_CACHE.clear()
+    jwk_cache = len(c._JWK_CACHE)
+
+    for _ in range(20):
+        c._resolve_did_web_rsa_pubkey(issuer, kid=uuid.uuid4().hex)
+    assert len(calls) == 1
+    assert c._resolve_did_web_rsa_pubkey(issuer, kid="keys-1") is not None
+    assert len(c._JWK_CACHE) == jwk_cache
+
+    # Pasado el intervalo, el siguiente 'kid' desconocido vuelve a descargar
+    c._DID_WEB_PUBKEY_CACHE[issuer]["miss_at"] -= 61
+    c._resolve_did_web_rsa_pubkey(issuer, kid=uuid.uuid4().hex)
+    assert len(calls) == 3
+    c._DID_WEB_PUBKEY_CACHE.clear()
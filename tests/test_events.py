@@ -0,0 +1,132 @@
+# tests/test_events.py
+import asyncio
+import json
+import time
+
+from app.core.events import EventHub, sse_stream
+
+
+def _parse(chunk: str) -> dict:
+    fields = dict(line.split(": ", 1) for line in chunk.strip().splitlines() if not line.startswith(":"))
+    return {"id": fields.get("id"), "event": fields.get("event"), "data": json.loads(fields["data"])}
+
+
+async def _take(stream, n):
+    out = []
+    async for chunk in stream:
+        if chunk.startswith(("retry:", ":")):
+            continue
+        out.append(_parse(chunk))
+        if len(out) == n:
+            break
+    return out
+
+
+def test_live_events_and_resume_from_last_event_id():
+    async def _run():
+        hub = EventHub()
+        sub = hub.subscribe()
+        stream = sse_stream(sub)
+        hub.publish("issued", jti="a", status="valid")
+        hub.publish("revoked", jti="a", status="revoked")
+        live = await _take(stream, 2)
+        await stream.aclose()
+
+        # Se pierde la conexión; mientras tanto llegan más eventos
+        hub.publish("revoked", jti="b", status="revoked")
+        resumed = await _take(sse_stream(hub.subscribe(live[-1]["id"])), 1)
+        return hub, live, resumed
+
+    hub, live, resumed = asyncio.run(_run())
+    assert [e["event"] for e in live] == ["issued", "revoked"]
+    assert [e["data"]["seq"] for e in live] == [1, 2]
+    assert resumed[0]["data"]["jti"] == "b"
+    assert resumed[0]["id"] == f"{hub.epoch}-3"
+
+
+def test_resume_from_other_epoch_or_gap_sends_reset():
+    async def _run():
+        hub = EventHub(history=2)
+        for i in range(5):
+            hub.publish("issued", jti=f"j{i}", status="valid")
+        other_epoch = await _take(sse_stream(hub.subscribe("deadbeef-3")), 1)
+        too_old = await _take(sse_stream(hub.subscribe(f"{hub.epoch}-1")), 1)
+        return other_epoch, too_old
+
+    other_epoch, too_old = asyncio.run(_run())
+    assert other_epoch[0]["event"] == "reset"
+    assert too_old[0]["event"] == "reset"
+
+
+def test_revoke_publishes_event(client):
+    from app.core.events import hub
+
+    r = client.post("/issuer/issue", json={
+        "athleteDid": "did:example:athlete123",
+        "name": "Nombre Apellido",
+        "event": {"name": "HYROX Barcelona", "date": "2025-11-15", "division": "Pro Men", "category": "Individual"},
+        "result": {"totalTime": "01:05:23", "splits": {"run1": "00:04:15"}},
+        "expDays": 30
+    })
+    jti = r.json()["jti"]
+    seq = hub.seq
+    client.post("/issuer/revoke", json={"jti": jti, "reason": "test"})
+
+    event = hub.subscribe(f"{hub.epoch}-{seq}")
+    event.close()
+    assert [(e["type"], e["jti"]) for e in event.backlog] == [("revoked", jti)]
+
+
+def test_events_are_shared_between_workers(client):
+    """Otro worker (su propio hub + registro en la misma BD) recibe la revocación con el mismo id."""
+    from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+
+    from app.core.config import settings
+    from app.core.events import hub
+    from app.db.event_log import EventLog
+
+    r = client.post("/issuer/issue", json={
+        "athleteDid": "did:example:athlete123",
+        "name": "Nombre Apellido",
+        "event": {"name": "HYROX Barcelona", "date": "2025-11-15"},
+        "result": {"totalTime": "01:05:23"},
+        "expDays": 30
+    })
+    jti = r.json()["jti"]
+
+    async def _worker_b(after_revoke):
+        engine = create_async_engine(settings.db_url)
+        other = EventHub()
+        log = EventLog(async_sessionmaker(engine, expire_on_commit=False), other, poll_ms=200, keep=0)
+        await log.start()
+        await log.stop()
+        sub = other.subscribe(after_revoke)  # id emitido por el worker A
+        sub.close()
+        await engine.dispose()
+        return other, sub
+
+    seq = hub.seq
+    client.post("/issuer/revoke", json={"jti": jti, "reason": "test"})
+    other, sub = asyncio.run(_worker_b(f"{hub.epoch}-{seq}"))
+
+    assert other.epoch == hub.epoch and other.seq == hub.seq
+    assert not sub.reset
+    assert [(e["type"], e["jti"], e["seq"]) for e in sub.backlog] == [("revoked", jti, hub.seq)]
+
+    # Y al revés: una revocación registrada por el worker B llega al hub de A por sondeo
+    async def _revoke_in_b():
+        from app.db.event_log import status_event
+        engine = create_async_engine(settings.db_url)
+        async with async_sessionmaker(engine, expire_on_commit=False)() as s:
+            ev = status_event("revoked", "vc-from-worker-b", "revoked", reason="b")
+            s.add(ev)
+            await s.commit()
+        await engine.dispose()
+        return ev.seq
+
+    b_seq = asyncio.run(_revoke_in_b())
+    for _ in range(100):
+        if hub.seq >= b_seq:
+            break
+        time.sleep(0.02)
+    assert hub._history[-1]["jti"] == "vc-from-worker-b" and hub.seq == b_seq
@@ -0,0 +1,127 @@
+# tests/test_idempotency.py
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from app.api import issuer
+from app.core.config import settings
+
+
+def _issue_payload(event_id=None):
+    event = {"name": "HYROX Barcelona", "date": "2025-11-15", "division": "Pro Men", "category": "Individual"}
+    if event_id is not None:
+        event["id"] = event_id
+    return {
+        "athleteDid": "did:example:athlete123",
+        "name": "Nombre Apellido",
+        "event": event,
+        "result": {"totalTime": "01:05:23", "splits": {"run1": "00:04:15"}},
+        "expDays": 30,
+    }
+
+
+def _count_signatures(monkeypatch, delay=0.0):
+    calls = []
+    real = issuer.sign_vc
+    def _sign(payload):
+        calls.append(payload["jti"])
+        time.sleep(delay)
+        return real(payload)
+    monkeypatch.setattr(issuer, "sign_vc", _sign)
+    return calls
+
+
+def test_retry_with_idempotency_key_returns_original(client, monkeypatch):
+    calls = _count_signatures(monkeypatch)
+    headers = {"Idempotency-Key": uuid.uuid4().hex}
+
+    first = client.post("/issuer/issue", json=_issue_payload(), headers=headers)
+    retry = client.post("/issuer/issue", json=_issue_payload(), headers=headers)
+    assert first.status_code == retry.status_code == 200
+    assert retry.json() == first.json()
+    assert retry.headers["idempotent-replayed"] == "true"
+    assert len(calls) == 1
+
+    # Sin cache en memoria (p.ej. otro worker) sale de la BD, tampoco se vuelve a firmar
+    issuer._IDEM_DONE.clear()
+    again = client.post("/issuer/issue", json=_issue_payload(), headers=headers)
+    assert again.json() == first.json()
+    assert len(calls) == 1
+
+    # Sin clave: emisiones independientes
+    a = client.post("/issuer/issue", json=_issue_payload()).json()
+    b = client.post("/issuer/issue", json=_issue_payload()).json()
+    assert a["jti"] != b["jti"]
+
+
+def test_natural_key_athlete_and_event_id(client, monkeypatch):
+    event_id = f"bcn-{uuid.uuid4().hex[:8]}"
+    # Por defecto no hay clave natural: cada petición es una emisión
+    a = client.post("/issuer/issue", json=_issue_payload(event_id)).json()
+    b = client.post("/issuer/issue", json=_issue_payload(event_id)).json()
+    assert a["jti"] != b["jti"]
+
+    monkeypatch.setattr(settings, "idempotency_natural_key", True)
+    event_id = f"{event_id}-nat"
+    a = client.post("/issuer/issue", json=_issue_payload(event_id)).json()
+    b = client.post("/issuer/issue", json=_issue_payload(event_id)).json()
+    c = client.post("/issuer/issue", json=_issue_payload(f"{event_id}-2")).json()
+    assert a["jti"] == b["jti"]
+    assert c["jti"] != a["jti"]
+
+
+def test_key_reused_with_different_body_is_rejected(client):
+    headers = {"Idempotency-Key": uuid.uuid4().hex}
+    first = client.post("/issuer/issue", json=_issue_payload(), headers=headers)
+    assert first.status_code == 200
+
+    other = {**_issue_payload(), "result": {"totalTime": "00:59:59"}}
+    assert client.post("/issuer/issue", json=other, headers=headers).status_code == 422
+    issuer._IDEM_DONE.clear()  # también desde la BD
+    assert client.post("/issuer/issue", json=other, headers=headers).status_code == 422
+    assert client.post("/issuer/issue", json=_issue_payload(), headers=headers).json() == first.json()
+
+
+def test_revoked_idempotency_key_is_not_reissued(client, monkeypatch):
+    calls = _count_signatures(monkeypatch)
+    headers = {"Idempotency-Key": uuid.uuid4().hex}
+    first = client.post("/issuer/issue", json=_issue_payload(), headers=headers).json()
+    client.post("/issuer/revoke", json={"jti": first["jti"]})
+
+    # Reintento tardío del cronometraje: no resucita la credencial revocada
+    late = client.post("/issuer/issue", json=_issue_payload(), headers=headers)
+    assert late.status_code == 410
+    issuer._IDEM_DONE.clear()
+    assert client.post("/issuer/issue", json=_issue_payload(), headers=headers).status_code == 410
+    assert len(calls) == 1
+
+
+def test_revoke_releases_natural_key_for_corrected_result(client, monkeypatch):
+    monkeypatch.setattr(settings, "idempotency_natural_key", True)
+    event_id = f"bcn-{uuid.uuid4().hex[:8]}"
+    first = client.post("/issuer/issue", json=_issue_payload(event_id)).json()
+    client.post("/issuer/revoke", json={"jti": first["jti"]})
+
+    corrected = {**_issue_payload(event_id), "result": {"totalTime": "01:04:59"}}
+    again = client.post("/issuer/issue", json=corrected)
+    assert again.status_code == 200
+    assert "idempotent-replayed" not in again.headers
+    assert again.json()["jti"] != first["jti"]
+    assert client.get(f"/verifier/scan?jti={again.json()['jti']}").json()["valid"] is True
+
+    # Y la nueva emisión vuelve a ser idempotente
+    assert client.post("/issuer/issue", json=corrected).json() == again.json()
+
+
+def test_concurrent_duplicates_are_coalesced(client, monkeypatch):
+    calls = _count_signatures(monkeypatch, delay=0.2)
+    headers = {"Idempotency-Key": uuid.uuid4().hex}
+
+    with ThreadPoolExecutor(max_workers=5) as ex:
+        responses = list(ex.map(
+            lambda _: client.post("/issuer/issue", json=_issue_payload(), headers=headers), range(5)
+        ))
+
+    assert {r.status_code for r in responses} == {200}
+    assert len({r.json()["jti"] for r in responses}) == 1
+    assert len(calls) == 1
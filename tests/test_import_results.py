@@ -0,0 +1,103 @@
+# tests/test_import_results.py
+import asyncio
+import csv
+import json
+
+import jwt as pyjwt
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+
+from app.core.config import settings
+from app.db.models import Credential
+from tools import import_results
+
+
+CSV = """athleteDid,name,expDays,event.name,event.date,result.totalTime,result.splits.run1
+did:example:a1,Atleta Uno,30,HYROX Madrid,2025-03-01,01:01:01,00:04:00
+did:example:a2,Atleta Dos,30,HYROX Madrid,2025-03-01,01:02:02,00:04:10
+did:example:a3,Atleta Tres,no-es-un-numero,HYROX Madrid,2025-03-01,01:03:03,00:04:20
+did:example:a4,Atleta Cuatro,30,HYROX Madrid,2025-03-01,01:04:04,00:04:30
+"""
+
+
+def _jtis_in_db(jtis):
+    async def _q():
+        engine = create_async_engine(settings.db_url)
+        async with async_sessionmaker(engine)() as s:
+            rows = (await s.execute(select(Credential).where(Credential.jti.in_(jtis)))).scalars().all()
+        await engine.dispose()
+        return rows
+    return asyncio.run(_q())
+
+
+def _count_rows(athletes):
+    """Credenciales en BD de esos atletas (por 'sub', cualquier jti)."""
+    async def _q():
+        engine = create_async_engine(settings.db_url)
+        async with async_sessionmaker(engine)() as s:
+            rows = (await s.execute(select(Credential.jwt))).scalars().all()
+        await engine.dispose()
+        return rows
+    subs = [pyjwt.decode(t, options={"verify_signature": False})["sub"] for t in asyncio.run(_q())]
+    return sum(subs.count(a) for a in athletes)
+
+
+def test_import_csv_is_chunked_validated_and_resumable(client, tmp_path):
+    src = tmp_path / "results.csv"
+    src.write_text(CSV, encoding="utf-8")
+
+    assert import_results.main([str(src), "--workers", "1", "--chunk", "2"]) == 0
+
+    cp = json.loads((tmp_path / "results.csv.checkpoint.json").read_text())
+    assert cp["rows"] == 4 and cp["imported"] == 3 and cp["invalid"] == 1
+
+    with (tmp_path / "results.csv.jti.csv").open() as f:
+        mapping = list(csv.DictReader(f))
+    assert [m["athleteDid"] for m in mapping] == ["did:example:a1", "did:example:a2", "did:example:a4"]
+
+    rows = _jtis_in_db([m["jti"] for m in mapping])
+    assert len(rows) == 3
+
+    # Se verifica como cualquier credencial emitida por la API
+    r = client.get(f"/verifier/scan?jti={mapping[0]['jti']}")
+    assert r.json()["valid"] is True
+
+    # Simula una caída justo tras el commit del 1er bloque (sin checkpoint):
+    # al reanudar no se duplica nada y el mapeo queda igual
+    cp.update(rows=0, map_offset=0, imported=0, invalid=0)
+    (tmp_path / "results.csv.checkpoint.json").write_text(json.dumps(cp))
+    import_results.main([str(src), "--workers", "1", "--chunk", "2"])
+
+    cp2 = json.loads((tmp_path / "results.csv.checkpoint.json").read_text())
+    assert cp2["imported"] == 0
+    with (tmp_path / "results.csv.jti.csv").open() as f:
+        assert list(csv.DictReader(f)) == mapping
+
+
+def test_crash_before_first_checkpoint_does_not_duplicate(client, tmp_path, monkeypatch):
+    src = tmp_path / "results.ndjson"
+    src.write_text("".join(json.dumps({
+        "athleteDid": f"did:example:crash{i}", "name": "Atleta", "expDays": 30,
+        "event": {"name": "HYROX Sevilla", "date": "2025-06-01"}, "result": {"totalTime": "01:00:00"},
+    }) + "\n" for i in range(2)), encoding="utf-8")
+
+    # Caída tras el commit del primer bloque, al escribir su checkpoint
+    real_save = import_results._save_checkpoint
+    def _crash(path, cp):
+        if cp["rows"] > 0:
+            raise RuntimeError("caída")
+        real_save(path, cp)
+    monkeypatch.setattr(import_results, "_save_checkpoint", _crash)
+    try:
+        import_results.main([str(src), "--workers", "1", "--chunk", "10"])
+    except RuntimeError:
+        pass
+    monkeypatch.setattr(import_results, "_save_checkpoint", real_save)
+
+    import_results.main([str(src), "--workers", "1", "--chunk", "10"])
+
+    with (tmp_path / "results.ndjson.jti.csv").open() as f:
+        mapping = list(csv.DictReader(f))
+    assert len(mapping) == 2
+    assert _count_rows(["did:example:crash0", "did:example:crash1"]) == 2
+
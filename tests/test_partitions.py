@@ -0,0 +1,85 @@
+# tests/test_partitions.py
+import asyncio
+from collections import OrderedDict
+import time
+import uuid
+
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+
+from app.core.config import settings
+from app.db.models import Credential
+from app.db.partitions import event_code, event_key, hot_set, jti_event_code
+
+
+def _issue(client, event):
+    r = client.post("/issuer/issue", json={
+        "athleteDid": "did:example:athlete123",
+        "name": "Nombre Apellido",
+        "event": event,
+        "result": {"totalTime": "01:05:23"},
+        "expDays": 30,
+    })
+    assert r.status_code == 200
+    return r.json()["jti"]
+
+
+def _db(coro_fn):
+    async def _run():
+        engine = create_async_engine(settings.db_url)
+        async with async_sessionmaker(engine, expire_on_commit=False)() as s:
+            out = await coro_fn(s)
+            await s.commit()
+        await engine.dispose()
+        return out
+    return asyncio.run(_run())
+
+
+def _wait_loaded(client, event, jti):
+    # La carga va en segundo plano en el loop de la app: se dispara con el 1er fallo
+    client.get(f"/verifier/scan?jti={jti}")
+    for _ in range(50):
+        if hot_set.lookup(jti) is not None:
+            return
+        client.get("/")
+        time.sleep(0.01)
+    raise AssertionError(f"partición de {event} no cargada")
+
+
+def test_credentials_are_tagged_and_routed_by_event(client):
+    name = f"HYROX Valencia {uuid.uuid4().hex[:6]}"
+    event = {"name": name, "date": "2024-05-10"}
+    jti = _issue(client, event)
+
+    key = event_key(event)
+    assert jti_event_code(jti) == event_code(key)
+    row = _db(lambda s: s.scalar(select(Credential).where(Credential.jti == jti)))
+    assert (row.event, row.season) == (key, "2024")
+
+    # Sin evento: jti sin código, siempre a la BD
+    assert jti_event_code(_issue(client, {})) is None
+
+
+def test_hot_set_serves_event_and_sees_revocations(client, monkeypatch):
+    monkeypatch.setattr(hot_set, "max_events", 4)  # opt-in
+    monkeypatch.setattr(hot_set, "_parts", OrderedDict())  # no se queda activo para otros tests
+    event = {"id": f"ev-{uuid.uuid4().hex[:8]}", "name": "HYROX Madrid", "date": "2025-03-01"}
+    jtis = [_issue(client, event) for _ in range(3)]
+    _wait_loaded(client, event, jtis[0])
+
+    hits = hot_set.hits.value
+    assert client.get(f"/verifier/scan?jti={jtis[1]}").json()["valid"] is True
+    assert hot_set.hits.value == hits + 1
+
+    # Revocación en este proceso: inmediata
+    client.post("/issuer/revoke", json={"jti": jtis[1]})
+    assert client.get(f"/verifier/scan?jti={jtis[1]}").json()["reason"] == "status=revoked"
+
+    # Sólo estados en memoria, sin el JWT
+    assert hot_set.lookup(jtis[0])[0] == "valid" and len(hot_set.lookup(jtis[0])) == 2
+
+    # Revocación hecha por otro worker (directa en BD): con la partición más vieja que
+    # refresh_s el hot set no contesta, así que se ve ya en la primera petición
+    monkeypatch.setattr(hot_set, "refresh_s", 0)
+    _db(lambda s: s.execute(update(Credential).where(Credential.jti == jtis[2]).values(status="revoked")))
+    assert client.get(f"/verifier/scan?jti={jtis[2]}").json() == {"valid": False, "reason": "status=revoked"}
@@ -0,0 +1,53 @@
+# tests/test_responses.py
+import json
+from datetime import datetime, timezone
+
+from app.core import responses
+
+
+def _issue(client):
+    r = client.post("/issuer/issue", json={
+        "athleteDid": "did:example:athlete123",
+        "name": "Nombre Apellido",
+        "event": {"name": "HYROX Barcelona", "date": "2025-11-15", "division": "Pro Men", "category": "Individual"},
+        "result": {"totalTime": "01:05:23", "splits": {"run1": "00:04:15"}},
+        "expDays": 30
+    })
+    return r.json()
+
+
+def test_list_and_detail_shape(client):
+    issued = _issue(client)
+
+    rows = client.get("/issuer/list").json()
+    row = next(r for r in rows if r["jti"] == issued["jti"])
+    assert set(row) == {"jti", "status", "exp", "issued_at"}
+    datetime.fromisoformat(row["issued_at"])
+
+    d = client.get(f"/issuer/detail?jti={issued['jti']}").json()
+    assert d["jwt_len"] == len(issued["token"])
+    assert d["issued_at"] == row["issued_at"]
+    assert client.get("/issuer/detail?jti=nope").status_code == 404
+
+
+def test_lists_are_gzipped_when_accepted(client):
+    for _ in range(20):
+        _issue(client)
+
+    gz = client.get("/holder/credentials", headers={"Accept-Encoding": "gzip"})
+    assert gz.headers.get("content-encoding") == "gzip"
+    assert len(gz.json()) >= 20  # httpx descomprime
+
+    plain = client.get("/holder/credentials", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in plain.headers
+
+    # Rutas fuera de la lista nunca se comprimen
+    v = client.get("/.well-known/did.json", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in v.headers
+
+
+def test_stdlib_fallback_matches_orjson(monkeypatch):
+    content = {"a": 1, "when": datetime(2025, 1, 2, 3, 4, 5, 6, tzinfo=timezone.utc), "ñ": ["x"]}
+    fast = responses.dumps(content)
+    monkeypatch.setattr(responses, "orjson", None)
+    assert json.loads(responses.dumps(content)) == json.loads(fast)
@@ -0,0 +1,136 @@
+# tests/test_status_table.py
+import multiprocessing
+import time
+
+import pytest
+
+from app.core import status_table as st
+from app.core.config import settings
+
+
+def _issue_payload():
+    return {
+        "athleteDid": "did:example:athlete123",
+        "name": "Nombre Apellido",
+        "event": {"name": "HYROX Barcelona", "date": "2025-11-15", "division": "Pro Men", "category": "Individual"},
+        "result": {"totalTime": "01:05:23", "splits": {"run1": "00:04:15"}},
+        "expDays": 30,
+    }
+
+
+def _child_put(path, jti):
+    t = st.StatusTable(path, 64)
+    t.put(jti, "revoked", 123)
+    t.close()
+
+
+def test_table_shared_between_processes(tmp_path):
+    path = tmp_path / "status.bin"
+    a = st.StatusTable(path, 64)
+    a.put("vc-1", "valid", 100)
+    g = a.generation
+
+    # Otro "worker" (proceso) abre el mismo fichero y revoca
+    p = multiprocessing.get_context("spawn").Process(target=_child_put, args=(str(path), "vc-1"))
+    p.start(); p.join(timeout=30)
+    assert p.exitcode == 0
+
+    assert a.get("vc-1") == ("revoked", 123)
+    assert a.get("vc-unknown") is None
+    assert a.generation == g + 2 and a.generation % 2 == 0
+    assert a.count == 1
+    a.close()
+
+
+def test_table_full_rejects_live_but_reuses_expired_slots(tmp_path):
+    t = st.StatusTable(tmp_path / "small.bin", 10)
+    live = int(time.time()) + 3600
+    rejected = t.rejected.value
+    inserted = [t.put(f"vc-{i}", "valid", live) for i in range(12)]
+    assert inserted.count(True) == 9
+    assert t.rejected.value == rejected + 3
+    assert t.get("vc-0") == ("valid", live)
+    # Actualizar un jti existente sigue funcionando con la tabla llena
+    assert t.put("vc-0", "revoked", live) is True
+
+    # Caducan todas (exp en el pasado): sus slots se reutilizan, sin crecer `count`
+    for i in range(9):
+        t.put(f"vc-{i}", "revoked" if i == 0 else "valid", 0)
+    assert t.put("fresh", "valid", live) is True
+    assert t.put_if_absent("fresh-2", "valid", live) is True
+    assert t.get("fresh") == ("valid", live) and t.get("fresh-2") == ("valid", live)
+    assert t.count == 9
+    assert t.reclaimed.value >= 2
+    t.close()
+
+
+def test_revoked_is_terminal_and_fill_never_overwrites(tmp_path):
+    t = st.StatusTable(tmp_path / "status.bin", 64)
+    assert t.put_if_absent("vc-1", "valid", 100) is True
+    assert t.put_if_absent("vc-1", "revoked", 100) is False
+    t.put("vc-1", "revoked", 100)
+    assert t.put("vc-1", "valid", 100) is False
+    assert t.get("vc-1") == ("revoked", 100)
+    t.close()
+
+
+@pytest.fixture
+def shared_table(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "status_table_path", (tmp_path / "status.bin").as_posix())
+    monkeypatch.setattr(st, "_TABLE", None)
+    yield
+    if st._TABLE is not None:
+        st._TABLE.close()
+    st._TABLE = None
+
+
+def test_issue_revoke_write_table_and_verifier_reads_it(client, shared_table):
+    r = client.post("/issuer/issue", json=_issue_payload())
+    jti = r.json()["jti"]
+    assert st.status_table().get(jti)[0] == "valid"
+    assert {"status_table_rejected", "status_table_reclaimed"} <= set(client.get("/metrics").json())
+
+    client.post("/issuer/revoke", json={"jti": jti})
+    assert st.status_table().get(jti)[0] == "revoked"
+    assert client.get(f"/verifier/scan?jti={jti}").json() == {"valid": False, "reason": "status=revoked"}
+
+    # El verificador confía en la tabla: otro worker la marcó como revocada
+    r = client.post("/issuer/issue", json=_issue_payload())
+    jti2, token2 = r.json()["jti"], r.json()["token"]
+    st.status_table().put(jti2, "revoked", 0)
+    out = client.post("/verifier/verify", json={"token": token2}).json()
+    assert out == {"valid": False, "reason": "status=revoked"}
+
+
+def test_verifier_fill_does_not_undo_concurrent_revoke(client, tmp_path, monkeypatch):
+    from app.api import verifier
+
+    # Evento propio: que el hot set de otros tests no conteste antes que la BD
+    body = {**_issue_payload(), "event": {"name": f"HYROX {tmp_path.name}", "date": "2025-11-15"}}
+    r = client.post("/issuer/issue", json=body)
+    jti, token = r.json()["jti"], r.json()["token"]
+
+    # Tabla vacía: el verificador lee "valid" de la BD y después rellena la tabla
+    monkeypatch.setattr(settings, "status_table_path", (tmp_path / "fill.bin").as_posix())
+    monkeypatch.setattr(st, "_TABLE", None)
+    real_session = verifier.SessionLocal
+
+    class _RevokeAfterRead:
+        # Entre la lectura de BD y el relleno, otro worker revoca la credencial
+        async def __aenter__(self):
+            self._cm = real_session()
+            return await self._cm.__aenter__()
+
+        async def __aexit__(self, *exc):
+            out = await self._cm.__aexit__(*exc)
+            st.status_table().put(jti, "revoked", 0)
+            return out
+
+    monkeypatch.setattr(verifier, "SessionLocal", _RevokeAfterRead)
+    assert client.post("/verifier/verify", json={"token": token}).json()["valid"] is True
+    assert st.status_table().get(jti)[0] == "revoked"
+
+    monkeypatch.setattr(verifier, "SessionLocal", real_session)
+    out = client.post("/verifier/verify", json={"token": token}).json()
+    assert out == {"valid": False, "reason": "status=revoked"}
+    st._TABLE.close()
@@ -0,0 +1,84 @@
+# tests/test_writer.py
+import asyncio
+import uuid
+
+import pytest
+from sqlalchemy import select, func
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+
+from app.core.config import settings
+from app.db.models import Credential
+from app.db.writer import CredentialWriter
+
+
+def _cred(jti=None):
+    return Credential(jti=jti or f"vc-test-{uuid.uuid4().hex[:12]}", jwt="x.y.z", exp=0, status="valid")
+
+
+def test_group_commit_batches_concurrent_inserts(client):
+    """Las inserciones concurrentes se agrupan en pocos commits y todas quedan en BD."""
+    async def _run():
+        engine = create_async_engine(settings.db_url)
+        sessions = async_sessionmaker(engine, expire_on_commit=False)
+        writer = CredentialWriter(sessions, max_batch=8, max_delay_ms=20)
+
+        flushes = []
+        orig_flush = writer._flush
+        async def _spy(batch):
+            flushes.append(len(batch))
+            await orig_flush(batch)
+        writer._flush = _spy
+
+        creds = [_cred() for _ in range(20)]
+        await asyncio.gather(*(writer.add(c) for c in creds))
+        await writer.stop()
+
+        async with sessions() as s:
+            n = (await s.execute(
+                select(func.count()).select_from(Credential).where(Credential.jti.in_([c.jti for c in creds]))
+            )).scalar_one()
+        await engine.dispose()
+        return flushes, n
+
+    flushes, n = asyncio.run(_run())
+    assert n == 20
+    assert sum(flushes) == 20
+    assert len(flushes) < 20
+    assert max(flushes) <= 8
+
+
+def test_group_commit_isolates_failing_row(client):
+    """Si una fila del lote falla (jti duplicado), sólo falla su petición."""
+    async def _run():
+        engine = create_async_engine(settings.db_url)
+        sessions = async_sessionmaker(engine, expire_on_commit=False)
+        writer = CredentialWriter(sessions, max_batch=8, max_delay_ms=20)
+
+        dup = f"vc-test-{uuid.uuid4().hex[:12]}"
+        await writer.add(_cred(dup))
+        results = await asyncio.gather(
+            writer.add(_cred()), writer.add(_cred(dup)), writer.add(_cred()),
+            return_exceptions=True,
+        )
+        await writer.stop()
+        await engine.dispose()
+        return results
+
+    ok1, failed, ok2 = asyncio.run(_run())
+    assert ok1 is None and ok2 is None
+    assert isinstance(failed, Exception)
+
+
+def test_metrics_expose_writer_histograms(client):
+    r = client.post("/issuer/issue", json={
+        "athleteDid": "did:example:athlete123",
+        "name": "Nombre Apellido",
+        "event": {"name": "HYROX Barcelona", "date": "2025-11-15", "division": "Pro Men", "category": "Individual"},
+        "result": {"totalTime": "01:05:23", "splits": {"run1": "00:04:15"}},
+        "expDays": 30
+    })
+    assert r.status_code == 200
+
+    m = client.get("/metrics").json()
+    assert m["writer_flush_size"]["count"] >= 1
+    assert "+Inf" in m["writer_flush_latency_ms"]["buckets"]
@@ -0,0 +1,82 @@
+"""
+Micro-benchmark de serialización de respuestas (antes/después del fast-path orjson).
+
+    python tools/bench_serialization.py [n_filas]
+
+- antes:   dicts con issued_at.isoformat() + jsonable_encoder + json.dumps (JSONResponse)
+- después: filas con datetime nativo + FastJSONResponse (orjson si está instalado)
+Además mide el tamaño y coste del gzip de un listado y una respuesta de /verifier/verify.
+"""
+from __future__ import annotations
+
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+import gzip
+import sys
+import timeit
+
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from app.core import responses
+from app.core.responses import FastJSONResponse
+
+
+def _rows(n: int) -> list[dict]:
+    t0 = datetime(2025, 11, 15, 9, 0, tzinfo=timezone.utc)
+    return [
+        {
+            "jti": f"vc-hyrox-1a2b3c-{i:012x}",
+            "status": "valid" if i % 50 else "revoked",
+            "exp": 1_790_000_000 + i,
+            "issued_at": t0 + timedelta(seconds=i, microseconds=i % 1000),
+        }
+        for i in range(n)
+    ]
+
+
+def _best(fn, number: int) -> float:
+    return min(timeit.repeat(fn, number=number, repeat=5)) / number
+
+
+def main(argv: list[str]) -> None:
+    n = int(argv[1]) if len(argv) > 1 else 10_000
+    rows = _rows(n)
+
+    def before():
+        data = [{**r, "issued_at": r["issued_at"].isoformat()} for r in rows]
+        return JSONResponse(jsonable_encoder(data)).body
+
+    def after():
+        return FastJSONResponse(rows).body
+
+    verify = {"valid": True, "claims": {"jti": rows[0]["jti"], "iss": "did:web:example.org",
+                                        "sub": "did:example:athlete123", "exp": rows[0]["exp"]}}
+
+    def verify_before():
+        return JSONResponse(jsonable_encoder(verify)).body
+
+    def verify_after():
+        return FastJSONResponse(verify).body
+
+    body = after()
+    t_before, t_after = _best(before, 3), _best(after, 3)
+    t_vb, t_va = _best(verify_before, 5000), _best(verify_after, 5000)
+    t_gzip = _best(lambda: gzip.compress(body, compresslevel=6), 3)
+    gz = gzip.compress(body, compresslevel=6)
+
+    print(f"backend JSON: {'orjson' if responses.orjson is not None else 'json (stdlib)'}")
+    print(f"listado {n} filas   antes {t_before * 1e3:8.2f} ms   después {t_after * 1e3:8.2f} ms"
+          f"   x{t_before / t_after:.1f}")
+    print(f"respuesta verify    antes {t_vb * 1e6:8.2f} us   después {t_va * 1e6:8.2f} us"
+          f"   x{t_vb / t_va:.1f}")
+    print(f"gzip listado        {len(body) / 1024:8.1f} KiB -> {len(gz) / 1024:.1f} KiB"
+          f" ({len(gz) / len(body):.0%}) en {t_gzip * 1e3:.2f} ms")
+
+
+if __name__ == "__main__":
+    main(sys.argv)
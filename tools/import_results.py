@@ -0,0 +1,268 @@
+"""
+Importación masiva de resultados (export CSV/NDJSON del cronometraje) como credenciales.
+
+    python tools/import_results.py resultados.csv
+    python tools/import_results.py resultados.ndjson --workers 8 --chunk 1000
+
+- Lee el fichero fila a fila (memoria acotada: como mucho un bloque en vuelo).
+- Valida cada fila contra IssueInput (las inválidas se saltan y se informan).
+- Firma en un pool de procesos (por defecto, todos los núcleos).
+- Inserta cada bloque en UNA transacción directamente en la BD de la app.
+- Reanudable: tras cada bloque guarda un checkpoint (<fichero>.checkpoint.json).
+  Los jti son deterministas por (ejecución, fila), así que si el proceso cae entre
+  el commit y el checkpoint, al reanudar no se duplican filas.
+- Con IDEMPOTENCY_NATURAL_KEY=true, si la fila trae event.id, athleteDid + event.id
+  es su clave natural: un resultado ya emitido (por la API o por otra importación)
+  y no revocado no se vuelve a insertar.
+- Escribe el mapeo fila -> jti en <fichero>.jti.csv e informa de filas/s.
+
+CSV: columnas athleteDid, name, expDays y el resto con prefijo "event." / "result."
+(se admiten niveles anidados: result.splits.run1). NDJSON: un IssueInput por línea.
+"""
+from __future__ import annotations
+
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Iterator
+import argparse
+import asyncio
+import csv
+import hashlib
+import json
+import os
+import sys
+import time
+import uuid
+
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from pydantic import ValidationError
+from sqlalchemy import or_, select
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+
+from app.api.issuer import IssueInput, build_vc_payload, idem_body_hash, idem_key_for
+from app.core.config import settings
+from app.core.crypto import sign_vc
+from app.core.status_table import status_table
+from app.db.models import Base, Credential, upgrade_schema
+from app.db.partitions import event_key, event_season, jti_prefix
+
+
+# ---------- lectura ----------
+
+def _unflatten(row: dict) -> dict:
+    """{"event.name": "X", "result.splits.run1": "Y"} -> {"event": {"name": "X"}, ...}"""
+    out: dict = {"event": {}, "result": {}}
+    for key, value in row.items():
+        if key is None or value is None or value == "":
+            continue
+        parts = key.strip().split(".")
+        node = out
+        for p in parts[:-1]:
+            node = node.setdefault(p, {})
+        node[parts[-1]] = value
+    return out
+
+
+def iter_rows(path: Path, fmt: str) -> Iterator[tuple[int, dict | None, str | None]]:
+    """(nº de fila, datos, error de parseo) en streaming."""
+    with path.open(newline="", encoding="utf-8-sig") as f:
+        if fmt == "csv":
+            for i, row in enumerate(csv.DictReader(f)):
+                yield i, _unflatten(row), None
+        else:
+            i = 0
+            for line in f:
+                if not line.strip():
+                    continue
+                try:
+                    yield i, json.loads(line), None
+                except json.JSONDecodeError as e:
+                    yield i, None, f"json: {e}"
+                i += 1
+
+
+# ---------- checkpoint ----------
+
+def _load_checkpoint(path: Path) -> dict:
+    if path.exists():
+        return json.loads(path.read_text())
+    cp = {"run_id": uuid.uuid4().hex, "rows": 0, "map_offset": 0, "imported": 0, "invalid": 0}
+    # Se guarda ya: el run_id (y con él los jti) debe sobrevivir a una caída
+    # entre el commit del primer bloque y su checkpoint
+    _save_checkpoint(path, cp)
+    return cp
+
+
+def _save_checkpoint(path: Path, cp: dict) -> None:
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    tmp.write_text(json.dumps(cp))
+    os.replace(tmp, path)
+
+
+def _row_jti(run_id: str, row: int, event: str | None) -> str:
+    return jti_prefix(event) + hashlib.sha256(f"{run_id}:{row}".encode()).hexdigest()[:12]
+
+
+# ---------- importación ----------
+
+async def _write_chunk(sessions, creds: list[Credential]) -> tuple[list[Credential], dict[str, str]]:
+    """
+    Inserta el bloque en una transacción, saltando jti ya presentes (reanudación)
+    y resultados ya emitidos con la misma clave natural athleteDid + event.id.
+    Devuelve (insertadas, jti propuesto -> jti real) para el mapeo.
+    """
+    jtis = [c.jti for c in creds]
+    keys = [c.idem_key for c in creds if c.idem_key]
+    async with sessions() as s:
+        rows = (await s.execute(
+            select(Credential.jti, Credential.idem_key)
+            .where(or_(
+                Credential.jti.in_(jtis),
+                Credential.idem_key.in_(keys) & (Credential.status != "revoked"),
+            ))
+        )).all()
+        existing_jtis = {r.jti for r in rows}
+        by_key = {r.idem_key: r.jti for r in rows if r.idem_key}
+        new, actual = [], {}
+        for c in creds:
+            if c.jti in existing_jtis:
+                actual[c.jti] = c.jti
+            elif c.idem_key and c.idem_key in by_key:
+                actual[c.jti] = by_key[c.idem_key]
+            else:
+                if c.idem_key:
+                    by_key[c.idem_key] = c.jti
+                actual[c.jti] = c.jti
+                new.append(c)
+        s.add_all(new)
+        await s.commit()
+    return new, actual
+
+
+async def run_import(
+    path: Path,
+    fmt: str,
+    workers: int,
+    chunk: int,
+    checkpoint: Path,
+    mapping: Path,
+) -> dict:
+    cp = _load_checkpoint(checkpoint)
+    engine = create_async_engine(settings.db_url, echo=False)
+    sessions = async_sessionmaker(engine, expire_on_commit=False)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        await conn.run_sync(upgrade_schema)
+
+    # Descarta líneas del mapeo posteriores al último checkpoint
+    with mapping.open("a+b") as m:
+        m.truncate(cp["map_offset"])
+    map_file = mapping.open("a", newline="", encoding="utf-8")
+    map_writer = csv.writer(map_file)
+    if cp["map_offset"] == 0:
+        map_writer.writerow(["row", "athleteDid", "jti"])
+
+    pool = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+    t0 = time.perf_counter()
+    done_now = 0
+
+    async def _flush(batch: list[tuple[int, IssueInput]], last_row: int) -> None:
+        nonlocal done_now
+        now = int(time.time())
+        payloads = [
+            build_vc_payload(body, _row_jti(cp["run_id"], i, event_key(body.event)), now)
+            for i, body in batch
+        ]
+        if pool is not None:
+            tokens = list(pool.map(sign_vc, payloads, chunksize=max(1, len(payloads) // (workers * 4))))
+        else:
+            tokens = [sign_vc(p) for p in payloads]
+        creds = []
+        for (_, body), p, t in zip(batch, payloads, tokens):
+            key = idem_key_for(body)
+            creds.append(Credential(
+                jti=p["jti"], jwt=t, exp=p["exp"], status="valid",
+                idem_key=key, idem_body_hash=idem_body_hash(body) if key else None,
+                event=event_key(body.event), season=event_season(body.event),
+            ))
+        actual: dict[str, str] = {}
+        if creds:
+            inserted, actual = await _write_chunk(sessions, creds)
+            cp["imported"] += len(inserted)
+            if (table := status_table()) is not None:
+                for c in inserted:
+                    table.put(c.jti, "valid", c.exp)
+        for (i, body), p in zip(batch, payloads):
+            map_writer.writerow([i, body.athleteDid, actual.get(p["jti"], p["jti"])])
+        map_file.flush()
+        cp["rows"] = last_row + 1
+        cp["map_offset"] = map_file.tell()
+        _save_checkpoint(checkpoint, cp)
+        done_now += len(batch)
+        rate = done_now / max(time.perf_counter() - t0, 1e-9)
+        print(f"  {cp['rows']} filas ({rate:.0f} filas/s)", file=sys.stderr)
+
+    try:
+        batch: list[tuple[int, IssueInput]] = []
+        last_row = cp["rows"] - 1
+        for i, data, err in iter_rows(path, fmt):
+            if i < cp["rows"]:
+                continue
+            last_row = i
+            if err is None:
+                try:
+                    batch.append((i, IssueInput.model_validate(data)))
+                except ValidationError as e:
+                    err = "; ".join(f"{'.'.join(map(str, x['loc']))}: {x['msg']}" for x in e.errors())
+            if err is not None:
+                cp["invalid"] += 1
+                print(f"fila {i}: inválida ({err})", file=sys.stderr)
+            if len(batch) >= chunk:
+                await _flush(batch, last_row)
+                batch = []
+        if batch or last_row + 1 > cp["rows"]:
+            await _flush(batch, last_row)
+    finally:
+        map_file.close()
+        if pool is not None:
+            pool.shutdown()
+        await engine.dispose()
+
+    elapsed = time.perf_counter() - t0
+    return {
+        "rows": cp["rows"],
+        "imported": cp["imported"],
+        "invalid": cp["invalid"],
+        "seconds": round(elapsed, 3),
+        "rows_per_sec": round(done_now / elapsed, 1) if elapsed > 0 else None,
+    }
+
+
+def main(argv: list[str] | None = None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("input", type=Path, help="fichero .csv o .ndjson/.jsonl")
+    ap.add_argument("--format", choices=["csv", "ndjson"], help="por defecto, según la extensión")
+    ap.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="procesos de firma")
+    ap.add_argument("--chunk", type=int, default=500, help="filas por transacción")
+    ap.add_argument("--checkpoint", type=Path, help="por defecto <input>.checkpoint.json")
+    ap.add_argument("--map", type=Path, help="mapeo fila -> jti; por defecto <input>.jti.csv")
+    args = ap.parse_args(argv)
+
+    fmt = args.format or ("csv" if args.input.suffix.lower() == ".csv" else "ndjson")
+    summary = asyncio.run(run_import(
+        args.input,
+        fmt,
+        workers=max(1, args.workers),
+        chunk=max(1, args.chunk),
+        checkpoint=args.checkpoint or args.input.with_name(args.input.name + ".checkpoint.json"),
+        mapping=args.map or args.input.with_name(args.input.name + ".jti.csv"),
+    ))
+    print(json.dumps(summary))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,6 +1,6 @@
 from cryptography.hazmat.primitives import serialization
 from pathlib import Path
-import base64, json, sys
+import base64, hashlib, json, sys
 
 def b64url(i: int) -> str:
     b = i.to_bytes((i.bit_length() + 7)//8, "big")
@@ -10,4 +10,7 @@ path = Path(sys.argv[1] if len(sys.argv) > 1 else "keys/issuer_public.pem")
 pub = serialization.load_pem_public_key(path.read_bytes())
 numbers = pub.public_numbers()
 jwk = {"kty": "RSA", "n": b64url(numbers.n), "e": b64url(numbers.e)}
+# kid = thumbprint RFC 7638 (el mismo que pone la app en la cabecera de los JWT)
+canonical = json.dumps({k: jwk[k] for k in ("e", "kty", "n")}, separators=(",", ":"))
+jwk["kid"] = base64.urlsafe_b64encode(hashlib.sha256(canonical.encode()).digest()).decode().rstrip("=")
 print(json.dumps(jwk, indent=2))